@@ -0,0 +1,235 @@
+"""Per-property and per-operator economics, computed with NumPy.
+
+load() reads the filtered revenue, volume and expense sums once and
+scatters them into dense arrays indexed [entity, month], with one row per
+(operator, property) pair and one column per calendar month from the first
+to the last month with data, gaps included. That keeps a one-column shift a
+month-over-month step and a twelve-column shift a year-over-year one, so
+every metric for every entity is a handful of whole-array operations:
+
+    net $/MCF         (revenue - expenses) / volume
+    deduction ratio   expenses / revenue
+    MoM / YoY         change in net $/MCF, and in revenue as a fraction
+    rolling average   mean net $/MCF over the trailing `window` months
+
+Months without volume (or revenue, for ratios) come out as NaN, which the
+JSON helpers turn into null.
+"""
+
+import sqlite3
+
+import numpy as np
+
+import db_queries
+
+# Expense group rows of Economics.expenses, in EXPENSE_GROUPS order
+GROUPS = list(db_queries.EXPENSE_GROUPS)
+
+DEFAULT_WINDOW = 3
+
+LEVELS = ("property", "operator")
+
+_GROUP_METRICS = [f"{g.lower().replace(' ', '_')}_per_mcf" for g in GROUPS]
+
+# Metric arrays compute() returns
+METRICS = [
+    "revenue", "volume", "total_expenses", "revenue_per_mcf", "expenses_per_mcf",
+    "net_per_mcf", "deduction_ratio", "net_per_mcf_mom", "net_per_mcf_yoy",
+    "revenue_mom", "revenue_yoy", "net_per_mcf_rolling", *_GROUP_METRICS,
+]
+
+
+class Economics:
+    """Dense [entity, month] sums for one filter set.
+
+    entities holds the operator and property of each row; property is None
+    once rolled up to operators. expenses is [group, entity, month];
+    total_expenses also counts types outside every group, as the dashboard does.
+    """
+
+    def __init__(self, months: list[str], entities: list[dict], revenue: np.ndarray,
+                 volume: np.ndarray, total_expenses: np.ndarray, expenses: np.ndarray):
+        self.months = months
+        self.entities = entities
+        self.revenue = revenue
+        self.volume = volume
+        self.total_expenses = total_expenses
+        self.expenses = expenses
+
+    def by_operator(self) -> "Economics":
+        """Sum the property rows of each operator into one row."""
+        operators, index = np.unique([e["operator"] for e in self.entities], return_inverse=True)
+        shape = (len(operators), len(self.months))
+        revenue, volume, total_expenses = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+        expenses = np.zeros((len(GROUPS), *shape))
+        np.add.at(revenue, index, self.revenue)
+        np.add.at(volume, index, self.volume)
+        np.add.at(total_expenses, index, self.total_expenses)
+        np.add.at(expenses, (slice(None), index), self.expenses)
+        entities = [{"operator": str(o), "property": None} for o in operators]
+        return Economics(self.months, entities, revenue, volume, total_expenses, expenses)
+
+
+def _month_number(month: str) -> int:
+    """'YYYY-MM' as a count of months, so consecutive months differ by one."""
+    return int(month[:4]) * 12 + int(month[5:7]) - 1
+
+
+def _month_label(number: int) -> str:
+    return f"{number // 12:04d}-{number % 12 + 1:02d}"
+
+
+def load(conn: sqlite3.Connection, filters: dict = None) -> Economics:
+    """Read the filtered sums into per-(operator, property) arrays."""
+    cells = db_queries.get_economics_cells(conn, filters)
+    if not cells:
+        empty = np.zeros((0, 0))
+        return Economics([], [], empty, empty, empty, np.zeros((len(GROUPS), 0, 0)))
+
+    # Code each key as an int in one pass; dicts beat np.unique's string sorts.
+    # The raw line items can lack an operator or property; the cube stores ''.
+    entity_codes, month_codes = {}, {}
+    codes = np.array([
+        (entity_codes.setdefault((o or "", p or ""), len(entity_codes)),
+         month_codes.setdefault(m, len(month_codes)))
+        for o, p, m, *_ in cells
+    ])
+    # SUM() over only NULLs is NULL, which a float array holds as NaN
+    sums = np.nan_to_num(np.array([c[3:] for c in cells], dtype=float))
+
+    # Entities sorted by (operator, property) rather than first appearance
+    entity_keys = sorted(entity_codes)
+    entity_rank = np.empty(len(entity_keys), dtype=int)
+    entity_rank[[entity_codes[k] for k in entity_keys]] = np.arange(len(entity_keys))
+
+    month_numbers = np.array([_month_number(m) for m in month_codes])
+    first = month_numbers.min()
+    months = [_month_label(n) for n in range(first, month_numbers.max() + 1)]
+
+    # Summed rather than assigned: a NULL and a '' key are separate rows that
+    # both land on the same entity
+    dense = np.zeros((sums.shape[1], len(entity_keys), len(months)))
+    np.add.at(dense, (slice(None), entity_rank[codes[:, 0]], (month_numbers - first)[codes[:, 1]]),
+              sums.T)
+
+    entities = [{"operator": o, "property": p} for o, p in entity_keys]
+    return Economics(months, entities, dense[0], dense[1], dense[2], dense[3:])
+
+
+def _lag(a: np.ndarray, months: int) -> np.ndarray:
+    """a shifted right by months along the month axis, NaN-filled."""
+    lagged = np.full_like(a, np.nan)
+    if months < a.shape[1]:
+        lagged[:, months:] = a[:, :-months]
+    return lagged
+
+
+def _rolling_mean(a: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the non-NaN values over each trailing window of months."""
+    present = ~np.isnan(a)
+    sums = np.cumsum(np.where(present, a, 0.0), axis=1)
+    counts = np.cumsum(present, axis=1)
+    if window < a.shape[1]:
+        sums[:, window:] = sums[:, window:] - sums[:, :-window]
+        counts[:, window:] = counts[:, window:] - counts[:, :-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def compute(econ: Economics, window: int = DEFAULT_WINDOW) -> dict[str, np.ndarray]:
+    """Every metric as an [entity, month] array."""
+    total_expenses = econ.total_expenses
+    volume = np.where(econ.volume != 0, econ.volume, np.nan)
+    revenue = np.where(econ.revenue != 0, econ.revenue, np.nan)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        net_per_mcf = (econ.revenue - total_expenses) / volume
+        metrics = {
+            "revenue": econ.revenue,
+            "volume": econ.volume,
+            "total_expenses": total_expenses,
+            "revenue_per_mcf": econ.revenue / volume,
+            "expenses_per_mcf": total_expenses / volume,
+            "net_per_mcf": net_per_mcf,
+            "deduction_ratio": total_expenses / revenue,
+            "net_per_mcf_mom": net_per_mcf - _lag(net_per_mcf, 1),
+            "net_per_mcf_yoy": net_per_mcf - _lag(net_per_mcf, 12),
+            "revenue_mom": econ.revenue / _lag(revenue, 1) - 1,
+            "revenue_yoy": econ.revenue / _lag(revenue, 12) - 1,
+            "net_per_mcf_rolling": _rolling_mean(net_per_mcf, window),
+        }
+        per_mcf = econ.expenses / volume
+    for name, group_per_mcf in zip(_GROUP_METRICS, per_mcf):
+        metrics[name] = group_per_mcf
+    return metrics
+
+
+def _json_values(a: np.ndarray) -> list:
+    """a as nested lists, with NaN and infinities as None."""
+    out = a.astype(object)
+    out[~np.isfinite(a)] = None
+    return out.tolist()
+
+
+# Keys of each summary() row, in order
+SUMMARY_COLUMNS = [
+    "operator", "property", "first_month", "latest_month",
+    "revenue", "volume", "total_expenses", "net_per_mcf", "deduction_ratio",
+    *(f"latest_{m}" for m in ["net_per_mcf", "deduction_ratio", "net_per_mcf_mom",
+                              "net_per_mcf_yoy", "revenue_mom", "revenue_yoy",
+                              "net_per_mcf_rolling"]),
+]
+
+
+def summary(econ: Economics, window: int = DEFAULT_WINDOW) -> list[dict]:
+    """One row per entity: lifetime totals plus its latest producing month's metrics."""
+    if not econ.entities:
+        return []
+    metrics = compute(econ, window)
+    producing = econ.volume != 0
+    has_volume = producing.any(axis=1)
+    months = len(econ.months)
+    first = np.argmax(producing, axis=1)
+    latest = months - 1 - np.argmax(producing[:, ::-1], axis=1)
+    rows = np.arange(len(econ.entities))
+
+    revenue = econ.revenue.sum(axis=1)
+    volume = econ.volume.sum(axis=1)
+    total_expenses = econ.total_expenses.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        columns = {
+            "revenue": revenue,
+            "volume": volume,
+            "total_expenses": total_expenses,
+            "net_per_mcf": (revenue - total_expenses) / np.where(volume != 0, volume, np.nan),
+            "deduction_ratio": total_expenses / np.where(revenue != 0, revenue, np.nan),
+        }
+    for name in SUMMARY_COLUMNS:
+        if name.startswith("latest_") and name != "latest_month":
+            columns[name] = np.where(has_volume, metrics[name[len("latest_"):]][rows, latest],
+                                     np.nan)
+    columns = {name: _json_values(a) for name, a in columns.items()}
+
+    result = []
+    for i, entity in enumerate(econ.entities):
+        row = dict(entity)
+        row["first_month"] = econ.months[first[i]] if has_volume[i] else None
+        row["latest_month"] = econ.months[latest[i]] if has_volume[i] else None
+        for name, values in columns.items():
+            row[name] = values[i]
+        result.append(row)
+    return result
+
+
+def series(econ: Economics, metric: str, window: int = DEFAULT_WINDOW) -> dict:
+    """One metric for every entity and month, for charting.
+
+    Returns {"months": [...], "entities": [...], "values": [[...], ...]},
+    with values[i][j] for entities[i] in months[j].
+    """
+    values = compute(econ, window)[metric] if econ.entities else np.zeros((0, 0))
+    return {
+        "months": econ.months,
+        "entities": econ.entities,
+        "values": _json_values(values),
+    }
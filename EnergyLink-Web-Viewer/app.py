@@ -7,7 +7,10 @@ import threading
 import webbrowser
 from pathlib import Path
 
-from flask import Flask, g, render_template
+from flask import Flask, g, jsonify, render_template, request
+
+import compression
+import db_queries
 
 # DB can live at ../data/energylink.db (dev) or ./data/energylink.db (distributed)
 _APP_DIR = Path(__file__).parent
@@ -16,17 +19,77 @@ if not DB_PATH.exists():
     DB_PATH = _APP_DIR.parent / "data" / "energylink.db"
 
 
+# Read connections are long-lived and reused across requests so SQLite's page
+# cache, mmap and prepared statements stay warm. They are read-only (mode=ro
+# plus query_only); the scraper writes through WAL, so readers see each
+# committed transaction without blocking it.
+READ_CACHE_KIB = 64 * 1024
+READ_MMAP_BYTES = 256 * 1024 * 1024
+READ_CACHED_STATEMENTS = 256
+# Idle connections kept for reuse; extra ones are closed when released.
+# The production server sets this to its thread count.
+MAX_IDLE_CONNECTIONS = 8
+
+_idle = []
+_idle_lock = threading.Lock()
+
+
+def connect_db() -> sqlite3.Connection:
+    """Open a tuned read-only connection.
+
+    It may move between threads but must only be used by one at a time.
+    """
+    uri = Path(DB_PATH).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                           cached_statements=READ_CACHED_STATEMENTS)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute(f"PRAGMA cache_size = -{READ_CACHE_KIB}")
+    conn.execute(f"PRAGMA mmap_size = {READ_MMAP_BYTES}")
+    return conn
+
+
+def acquire_db() -> sqlite3.Connection:
+    """Take an idle read connection from the pool, or open one."""
+    with _idle_lock:
+        if _idle:
+            return _idle.pop()
+    return connect_db()
+
+
+def release_db(conn: sqlite3.Connection) -> None:
+    """Return a connection from acquire_db to the pool."""
+    with _idle_lock:
+        if len(_idle) < MAX_IDLE_CONNECTIONS:
+            _idle.append(conn)
+            return
+    conn.close()
+
+
+def set_pool_size(size: int) -> None:
+    """Keep up to size idle connections, e.g. one per server thread."""
+    global MAX_IDLE_CONNECTIONS
+    MAX_IDLE_CONNECTIONS = max(1, size)
+
+
+def close_pool() -> None:
+    """Close every idle read connection."""
+    with _idle_lock:
+        conns, _idle[:] = list(_idle), []
+    for conn in conns:
+        conn.close()
+
+
 def get_db() -> sqlite3.Connection:
     if "db" not in g:
-        g.db = sqlite3.connect(str(DB_PATH))
-        g.db.row_factory = sqlite3.Row
+        g.db = acquire_db()
     return g.db
 
 
 def close_db(e=None):
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        release_db(db)
 
 
 def create_app(debug=False):
@@ -34,13 +97,29 @@ def create_app(debug=False):
     app.config["DEBUG"] = debug
 
     app.teardown_appcontext(close_db)
+    compression.init_app(app)
 
+    from blueprints.analytics import bp as analytics_bp
     from blueprints.dashboard import bp as dashboard_bp
+    from blueprints.export import bp as export_bp
     from blueprints.invoices import bp as invoices_bp
 
+    app.register_blueprint(analytics_bp)
     app.register_blueprint(dashboard_bp)
+    app.register_blueprint(export_bp)
     app.register_blueprint(invoices_bp)
 
+    # Streamed responses query after their headers are out, so an API
+    # request checks the schema up front to fail with a proper status
+    @app.before_request
+    def check_schema():
+        if request.path.startswith("/api/"):
+            db_queries.check_schema(get_db())
+
+    @app.errorhandler(db_queries.SchemaError)
+    def schema_error(e):
+        return jsonify({"error": str(e)}), 503
+
     @app.route("/")
     def index():
         return render_template("index.html")
@@ -69,19 +148,56 @@ def open_browser(url, delay=1.0):
     threading.Thread(target=_open, daemon=True).start()
 
 
-if __name__ == "__main__":
+def main():
     parser = argparse.ArgumentParser(description="EnergyLink Web Viewer")
-    parser.add_argument("--debug", action="store_true", help="Run in debug mode")
+    parser.add_argument("--debug", action="store_true",
+                        help="Run Flask's development server in debug mode")
     parser.add_argument("--port", type=int, default=0, help="Port number (0 = auto)")
     parser.add_argument("--no-browser", action="store_true", help="Don't open browser")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Request threads (and pooled DB connections) "
+                             "for the production server (default 8)")
+    parser.add_argument("--bench", action="store_true",
+                        help="Benchmark the API endpoints and exit")
+    parser.add_argument("--bench-requests", type=int, default=200,
+                        help="Requests per endpoint for --bench")
+    parser.add_argument("--bench-clients", type=int, default=8,
+                        help="Concurrent clients for --bench")
+    parser.add_argument("--bench-uncached", action="store_true",
+                        help="Turn the response cache off for --bench, so every "
+                             "request runs its DB queries")
     args = parser.parse_args()
+    if args.bench_requests < 2:
+        parser.error("--bench-requests must be at least 2")
 
-    port = args.port if args.port else find_open_port()
+    from server import DEFAULT_THREADS, Server
+    threads = args.threads or DEFAULT_THREADS
 
     app = create_app(debug=args.debug)
 
+    if args.bench:
+        import bench
+        bench.run(app, threads, args.bench_requests, args.bench_clients,
+                  cached=not args.bench_uncached)
+        return
+
+    port = args.port if args.port else find_open_port()
+
     if not args.no_browser and not args.debug:
         open_browser(f"http://127.0.0.1:{port}")
 
     print(f"Starting EnergyLink Viewer on http://127.0.0.1:{port}")
-    app.run(host="127.0.0.1", port=port, debug=args.debug)
+    if args.debug:
+        app.run(host="127.0.0.1", port=port, debug=True)
+        return
+
+    server = Server(app, "127.0.0.1", port, threads)
+    print(f"Serving with {server.engine} on {threads} threads; Ctrl+C to stop")
+    server.run()
+
+
+if __name__ == "__main__":
+    # Run through the importable module so this process has a single copy of
+    # its globals (DB pool, DB_PATH) shared with the blueprints' "from app import"
+    from app import main
+    main()
@@ -0,0 +1,93 @@
+"""Load benchmark for the viewer's API endpoints (python app.py --bench).
+
+Starts the production server on a free local port in this process, then
+sends each endpoint a fixed number of requests from concurrent clients and
+reports requests per second plus p50/p99 latency. Responses after the first
+come from the response cache unless the database changes meanwhile, as they
+would for analysts repeating a view; --bench-uncached turns the cache off so
+every request runs its queries.
+"""
+
+import json
+import logging
+import statistics
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import response_cache
+from server import Server
+
+ENDPOINTS = [
+    "/api/dashboard/filters",
+    "/api/dashboard/monthly",
+    "/api/dashboard/monthly?format=columnar",
+    "/api/dashboard/details?draw=1&start=0&length=25",
+    "/api/dashboard/details?format=columnar",
+    "/api/analytics/summary",
+    "/api/analytics/series?level=operator",
+    "/api/invoices/",
+    "/api/invoices/{invoice_id}",
+]
+
+
+def _fetch(url: str) -> float:
+    """GET url the way the browser would; returns the latency in seconds."""
+    request = urllib.request.Request(url, headers={"Accept-Encoding": "gzip"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def _first_invoice_id(base: str) -> int | None:
+    with urllib.request.urlopen(base + "/api/invoices/") as response:
+        invoices = json.loads(response.read())
+    return invoices[0]["invoice_id"] if invoices else None
+
+
+def run(app, threads: int, requests: int, clients: int, cached: bool = True) -> list[dict]:
+    """Benchmark every endpoint; returns one result dict per endpoint.
+
+    requests must be at least 2 for the percentiles.
+    """
+    if requests < 2:
+        raise ValueError("requests must be at least 2")
+    response_cache.enabled = cached
+    # werkzeug logs every request, which would bury the report
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = Server(app, "127.0.0.1", 0, threads)
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{server.port}"
+    print(f"Benchmarking {server.engine} with {threads} threads: "
+          f"{requests} requests per endpoint from {clients} clients, "
+          f"response cache {'on' if cached else 'off'}")
+
+    invoice_id = _first_invoice_id(base)
+    results = []
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for endpoint in ENDPOINTS:
+            if "{invoice_id}" in endpoint:
+                if invoice_id is None:
+                    continue
+                endpoint = endpoint.format(invoice_id=invoice_id)
+            url = base + endpoint
+            _fetch(url)  # warm up
+
+            start = time.perf_counter()
+            latencies = sorted(pool.map(_fetch, [url] * requests))
+            elapsed = time.perf_counter() - start
+
+            percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+            results.append({
+                "endpoint": endpoint,
+                "rps": requests / elapsed,
+                "p50_ms": percentiles[49] * 1000,
+                "p99_ms": percentiles[98] * 1000,
+            })
+
+    print(f"{'endpoint':<50} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for r in results:
+        print(f"{r['endpoint']:<50} {r['rps']:>9.1f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+    return results
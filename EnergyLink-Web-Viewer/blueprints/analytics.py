@@ -0,0 +1,57 @@
+"""Per-property and per-operator economics endpoints (see analytics.py)."""
+
+from flask import Blueprint, jsonify, request
+
+import analytics
+from app import get_db
+from blueprints.dashboard import _parse_filters
+from cache import cached
+from columnar import to_columnar
+
+bp = Blueprint("analytics", __name__, url_prefix="/api/analytics")
+
+
+def _parse_options():
+    """(level, window, error) from ?level=property|operator&window=N; error is None if valid."""
+    level = request.args.get("level", "property")
+    if level not in analytics.LEVELS:
+        return None, None, (jsonify({"error": f"Unknown level: {level}"}), 400)
+    window = request.args.get("window", analytics.DEFAULT_WINDOW, type=int)
+    if window < 1:
+        return None, None, (jsonify({"error": "window must be at least 1"}), 400)
+    return level, window, None
+
+
+def _load(level: str) -> analytics.Economics:
+    econ = analytics.load(get_db(), _parse_filters())
+    return econ.by_operator() if level == "operator" else econ
+
+
+@bp.route("/summary")
+@cached
+def summary():
+    """One row per property (or operator): totals and latest-month metrics.
+
+    Takes the dashboard filters plus ?level and ?window (rolling months);
+    ?format=columnar encodes the rows column by column.
+    """
+    level, window, error = _parse_options()
+    if error:
+        return error
+    rows = analytics.summary(_load(level), window)
+    if request.args.get("format") == "columnar":
+        return jsonify(to_columnar(analytics.SUMMARY_COLUMNS, rows))
+    return jsonify(rows)
+
+
+@bp.route("/series")
+@cached
+def series():
+    """?metric=<name> for every property (or operator) and month."""
+    level, window, error = _parse_options()
+    if error:
+        return error
+    metric = request.args.get("metric", "net_per_mcf")
+    if metric not in analytics.METRICS:
+        return jsonify({"error": f"Unknown metric: {metric}"}), 400
+    return jsonify(analytics.series(_load(level), metric, window))
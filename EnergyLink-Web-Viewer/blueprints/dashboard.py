@@ -1,9 +1,12 @@
 """Dashboard API endpoints."""
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, abort, jsonify, request
 
 from app import get_db
+from cache import cached, cached_value
+from columnar import to_columnar
 import db_queries
+from streaming import FORMATS, stream_query
 
 bp = Blueprint("dashboard", __name__, url_prefix="/api/dashboard")
 
@@ -36,20 +39,84 @@ def _parse_filters() -> dict:
 
 
 @bp.route("/filters")
+@cached
 def filters():
     conn = get_db()
     return jsonify(db_queries.get_filter_options(conn))
 
 
 @bp.route("/monthly")
+@cached
 def monthly():
     conn = get_db()
     filters = _parse_filters()
-    return jsonify(db_queries.get_monthly_rollup(conn, filters))
+    rows = db_queries.get_monthly_rollup(conn, filters)
+    if _response_format() == "columnar":
+        # Every month appears once, so nothing here is worth dictionary-encoding
+        return jsonify(to_columnar(list(rows[0]) if rows else [], rows, dictionary=()))
+    return jsonify(rows)
+
+
+def _parse_datatables_order() -> list[tuple[str, str]]:
+    """Map DataTables' order[i][column] indexes to column names."""
+    order = []
+    i = 0
+    while f"order[{i}][column]" in request.args:
+        index = request.args.get(f"order[{i}][column]")
+        column = request.args.get(f"columns[{index}][data]")
+        if column:
+            order.append((column, request.args.get(f"order[{i}][dir]", "asc")))
+        i += 1
+    return order
+
+
+def _response_format() -> str | None:
+    """The requested ?format: a streaming format (ndjson, csv), columnar, or None for JSON rows."""
+    fmt = request.args.get("format")
+    if fmt is not None and fmt != "columnar" and fmt not in FORMATS:
+        abort(400, f"Unknown format: {fmt}")
+    return fmt
 
 
 @bp.route("/details")
+@cached
 def details():
-    conn = get_db()
+    """All detail rows, or one page of them for a DataTables server-side request.
+
+    DataTables sends draw, start, length, search[value], order[i][...] and
+    columns[i][data]; the response carries draw back with recordsTotal,
+    recordsFiltered and that page's rows. ?format=ndjson|csv streams every
+    row instead of building one JSON array; ?format=columnar encodes the rows
+    (or the page's rows) column by column.
+    """
     filters = _parse_filters()
-    return jsonify(db_queries.get_raw_details(conn, filters))
+
+    fmt = _response_format()
+    if fmt in FORMATS:
+        return stream_query(db_queries.RAW_DETAIL_COLUMNS,
+                            lambda c: db_queries.iter_raw_details(c, filters), fmt,
+                            filename=f"details.{fmt}")
+
+    conn = get_db()
+
+    draw = request.args.get("draw", type=int)
+    if draw is None:
+        if fmt == "columnar":
+            return jsonify(to_columnar(db_queries.RAW_DETAIL_COLUMNS,
+                                       db_queries.iter_raw_details(conn, filters)))
+        return jsonify(db_queries.get_raw_details(conn, filters))
+
+    page = cached_value(lambda: db_queries.get_raw_details_page(
+        conn, filters,
+        start=request.args.get("start", 0, type=int),
+        length=request.args.get("length", 25, type=int),
+        order=_parse_datatables_order(),
+        search=request.args.get("search[value]", "").strip(),
+    ))
+    return jsonify({
+        "draw": draw,
+        "recordsTotal": page["total"],
+        "recordsFiltered": page["filtered"],
+        "data": (to_columnar(db_queries.RAW_DETAIL_COLUMNS, page["data"])
+                 if fmt == "columnar" else page["data"]),
+    })
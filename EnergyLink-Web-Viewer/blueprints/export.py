@@ -0,0 +1,143 @@
+"""Export endpoints: filtered details, monthly rollup and invoice headers as files.
+
+Every endpoint takes the dashboard filters and ?format=csv (default) or
+parquet. CSV is streamed straight from the SQLite cursor. Parquet needs the
+optional pyarrow package (501 without it): details come as a zip holding one
+file per production month (production_month=YYYY-MM/part-0.parquet), written
+a month at a time; the small rollup and invoice exports are single files.
+"""
+
+import io
+import itertools
+import zipfile
+
+from flask import Blueprint, abort, jsonify, request
+
+from blueprints.dashboard import _parse_filters
+import db_queries
+from streaming import stream_query, stream_response
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+bp = Blueprint("export", __name__, url_prefix="/api/export")
+
+# Rows per Parquet row group
+_PARQUET_BATCH_ROWS = 50_000
+
+_INTEGER_COLUMNS = {"invoice_id", "statement_id"}
+_TEXT_COLUMNS = {
+    "operator", "property", "category", "code", "type_description",
+    "production_date", "production_month", "doc_type", "owner_number",
+    "check_number", "invoice_date", "op_acct_month", "received_date", "status",
+    "cost_center", "state", "county",
+}
+
+
+def _arrow_schema(columns: list[str]):
+    """Fixed column types, so every batch and partition shares one schema."""
+    return pa.schema([
+        (name, pa.int64() if name in _INTEGER_COLUMNS
+         else pa.string() if name in _TEXT_COLUMNS else pa.float64())
+        for name in columns
+    ])
+
+
+def _write_parquet(out, columns: list[str], rows) -> None:
+    schema = _arrow_schema(columns)
+    with pq.ParquetWriter(out, schema) as writer:
+        rows = iter(rows)
+        while batch := list(itertools.islice(rows, _PARQUET_BATCH_ROWS)):
+            arrays = [pa.array(values, type=field.type)
+                      for values, field in zip(zip(*batch), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+def _parquet_file(columns: list[str], rows):
+    buf = io.BytesIO()
+    _write_parquet(buf, columns, rows)
+    yield buf.getvalue()
+
+
+class _ChunkSink:
+    """Write-only file for ZipFile that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def _parquet_partitions(columns: list[str], rows, partition: str):
+    """Zip of one Parquet file per partition value; rows must arrive grouped by it."""
+    index = columns.index(partition)
+    sink = _ChunkSink()
+    # The sink can't seek, so ZipFile streams entries with data descriptors
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as zf:
+        for value, group in itertools.groupby(rows, key=lambda row: row[index]):
+            buf = io.BytesIO()
+            _write_parquet(buf, columns, group)
+            name = value if value is not None else "__HIVE_DEFAULT_PARTITION__"
+            zf.writestr(f"{partition}={name}/part-0.parquet", buf.getvalue())
+            yield sink.take()
+    yield sink.take()
+
+
+def _export_format() -> str:
+    fmt = request.args.get("format", "csv")
+    if fmt not in ("csv", "parquet"):
+        abort(400, f"Export supports csv and parquet, not {fmt}")
+    return fmt
+
+
+def _export(name: str, columns: list[str], query, partition: str = None):
+    fmt = _export_format()
+    if fmt == "csv":
+        return stream_query(columns, query, "csv", filename=f"{name}.csv")
+
+    if pq is None:
+        return jsonify({"error": "Parquet export needs pyarrow (pip install pyarrow)"}), 501
+    if partition:
+        return stream_response(query, lambda rows: _parquet_partitions(columns, rows, partition),
+                               "application/zip", filename=f"{name}_parquet.zip")
+    return stream_response(query, lambda rows: _parquet_file(columns, rows),
+                           "application/vnd.apache.parquet", filename=f"{name}.parquet")
+
+
+@bp.route("/details")
+def details():
+    """Every filtered detail row with its property and invoice fields."""
+    filters = _parse_filters()
+    return _export("details", db_queries.EXPORT_COLUMNS,
+                   lambda conn: db_queries.iter_export_rows(conn, filters),
+                   partition="production_month")
+
+
+@bp.route("/monthly")
+def monthly():
+    """The filtered monthly rollup, as shown on the dashboard."""
+    filters = _parse_filters()
+    columns = db_queries.MONTHLY_COLUMNS
+    return _export("monthly", columns, lambda conn: (
+        [row[c] for c in columns] for row in db_queries.get_monthly_rollup(conn, filters)
+    ))
+
+
+@bp.route("/invoices")
+def invoices():
+    """Invoice headers; with filters, those having a matching detail."""
+    filters = _parse_filters()
+    return _export("invoices", db_queries.INVOICE_COLUMNS,
+                   lambda conn: db_queries.iter_invoice_headers(conn, filters))
@@ -1,20 +1,37 @@
 """Invoice API endpoints."""
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 
 from app import get_db
+from cache import cached
 import db_queries
 
 bp = Blueprint("invoices", __name__, url_prefix="/api/invoices")
 
 
 @bp.route("/")
+@cached
 def invoice_list():
     conn = get_db()
     return jsonify(db_queries.get_invoice_list(conn))
 
 
+@bp.route("/batch")
+@cached
+def invoice_batch():
+    """Full details for several invoices: ?ids=1&ids=2 or ?ids=1,2."""
+    try:
+        ids = [int(i) for value in request.args.getlist("ids") for i in value.split(",") if i]
+    except ValueError:
+        return jsonify({"error": "ids must be integers"}), 400
+    if not ids:
+        return jsonify({"error": "No invoice ids given"}), 400
+    conn = get_db()
+    return jsonify(db_queries.get_invoice_details(conn, ids))
+
+
 @bp.route("/<int:invoice_id>")
+@cached
 def invoice_detail(invoice_id):
     conn = get_db()
     result = db_queries.get_invoice_detail(conn, invoice_id)
@@ -0,0 +1,179 @@
+"""In-process LRU cache of JSON API responses, invalidated when the DB changes.
+
+The database only changes when the scraper commits, so a response can be
+reused until then. Changes are detected with SQLite's PRAGMA data_version,
+which is polled on one long-lived connection: its value only moves when
+another connection commits, and is only comparable within that connection.
+
+Cached responses carry an ETag, and a request whose If-None-Match still
+matches gets an empty 304 instead of the body. Each body is compressed once,
+when it is stored, and a hit is served in the encoding the client accepts.
+"""
+
+import functools
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+
+import compression
+from app import connect_db
+
+# Cached responses kept before the least recently used is evicted, by count
+# and by total body size; an entry whose bodies (in all encodings) come to
+# over MAX_ENTRY_BYTES is never cached
+MAX_ENTRIES = 256
+MAX_BYTES = 64 * 1024 * 1024
+MAX_ENTRY_BYTES = 8 * 1024 * 1024
+
+# Filter params whose value order doesn't change the result
+_UNORDERED_PARAMS = {"operators", "properties", "categories"}
+
+# Params that never change the result: jQuery's cache buster and DataTables' draw counter
+_IGNORED_PARAMS = {"_", "draw"}
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES,
+                 max_entry_bytes: int = MAX_ENTRY_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()  # key -> (entry, size in bytes)
+        self._bytes = 0
+        self._version = None
+        # Off for benchmarks of the uncached query path
+        self.enabled = True
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _data_version(self) -> int:
+        if self._conn is None:
+            # Kept out of the request pool; only used under self._lock
+            self._conn = connect_db()
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def check_version(self) -> int:
+        """Drop every entry if the database changed since the last check.
+
+        Returns the version checked, for put.
+        """
+        with self._lock:
+            version = self._data_version()
+            if version != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+            return version
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            self._entries.move_to_end(key)
+            return item[0]
+
+    def put(self, key, entry, size: int, version: int) -> None:
+        """Store entry, whose body is size bytes, unless it is too big to keep.
+
+        version is what check_version returned before entry was computed; if
+        the cache has moved on to a newer one since, entry may be stale and
+        is dropped.
+        """
+        if not self.enabled or size > self.max_entry_bytes:
+            return
+        with self._lock:
+            if version != self._version:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (entry, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+
+response_cache = ResponseCache()
+
+
+def _request_key() -> tuple:
+    """The request path plus its query params, with filter lists sorted."""
+    params = tuple(sorted(
+        (name, tuple(sorted(values)) if name in _UNORDERED_PARAMS else tuple(values))
+        for name, values in request.args.lists() if name not in _IGNORED_PARAMS
+    ))
+    return request.path, params
+
+
+def _respond(entry: tuple) -> Response:
+    etag, bodies, mimetype = entry
+    encoding = None
+    # compression may have weakened the tag sent out; If-None-Match compares weakly
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        encoding = compression.choose_encoding()
+        if encoding not in bodies:
+            # compress_response still adds Vary, as for any body it leaves as is
+            encoding = None
+        response = Response(bodies[encoding], mimetype=mimetype)
+    response.set_etag(etag)
+    if encoding:
+        compression.mark_encoded(response, encoding)
+    # Let the browser keep the body but revalidate it on every use
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def cached_value(compute):
+    """Return compute()'s result for this request, from the cache if possible.
+
+    For views whose response can't be reused as-is, such as DataTables pages
+    that must echo the request's draw counter.
+    """
+    version = response_cache.check_version()
+    key = ("value", *_request_key())
+    value = response_cache.get(key)
+    if value is None:
+        value = compute()
+        # Sized as the JSON it is served as
+        response_cache.put(key, value, len(json.dumps(value, default=str)), version)
+    return value
+
+
+def cached(view):
+    """Cache a view's successful, non-streamed responses.
+
+    DataTables requests (with a draw param) bypass it; see cached_value.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if "draw" in request.args:
+            return view(*args, **kwargs)
+        version = response_cache.check_version()
+        key = _request_key()
+        entry = response_cache.get(key)
+        if entry is not None:
+            return _respond(entry)
+
+        response = view(*args, **kwargs)
+        if isinstance(response, tuple) or response.status_code != 200 or response.is_streamed:
+            return response
+        body = response.get_data()
+        # A body too big to keep isn't worth encoding ahead of time
+        if len(body) > response_cache.max_entry_bytes:
+            bodies = {None: body}
+        else:
+            bodies = compression.encode_variants(body, response.mimetype)
+        entry = (hashlib.sha1(body).hexdigest(), bodies, response.mimetype)
+        response_cache.put(key, entry, sum(len(b) for b in bodies.values()), version)
+        return _respond(entry)
+
+    return wrapper
@@ -0,0 +1,34 @@
+"""Compact column-oriented JSON encoding for the dashboard APIs (?format=columnar).
+
+Instead of an array of objects that repeats every key on every row, the
+payload holds one array per column:
+
+    {"length": 2,
+     "columns": {"owner_value": [12.5, -3.1],
+                 "operator": {"values": ["Devon", "XTO"], "codes": [0, 1]}}}
+
+Low-cardinality text columns are dictionary-encoded: "values" lists each
+distinct value once and "codes" indexes into it row by row.
+"""
+
+from typing import Iterable
+
+# Columns worth dictionary-encoding wherever they appear
+DICTIONARY_COLUMNS = frozenset({
+    "operator", "property", "category", "type_description", "code", "production_date",
+})
+
+
+def to_columnar(columns: list[str], rows: Iterable, dictionary=DICTIONARY_COLUMNS) -> dict:
+    """Encode rows (dicts or sqlite3.Rows) column by column."""
+    rows = rows if isinstance(rows, list) else list(rows)
+    encoded = {}
+    for name in columns:
+        values = [row[name] for row in rows]
+        if name in dictionary:
+            index = {}
+            codes = [index.setdefault(v, len(index)) for v in values]
+            encoded[name] = {"values": list(index), "codes": codes}
+        else:
+            encoded[name] = values
+    return {"length": len(rows), "columns": encoded}
@@ -0,0 +1,167 @@
+"""Response compression and precompressed, fingerprinted static assets.
+
+API responses in a text format are gzip- or brotli-encoded (brotli needs the
+optional brotli package) when the client accepts it and the body is at least
+MIN_SIZE bytes; streamed exports are gzipped chunk by chunk as they go out.
+The response cache stores encode_variants() of each body, so a cache hit is
+served already encoded instead of being compressed again.
+
+Static files are read and compressed once at startup. url_for('static', ...)
+adds a ?v=<content hash> fingerprint, and fingerprinted requests are served
+with a year-long immutable Cache-Control, so browsers only refetch an asset
+after it changes. Debug mode serves static files normally so edits show up.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import zlib
+from pathlib import Path
+
+from flask import Flask, Response, request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Smaller bodies aren't worth the CPU or the encoding overhead
+MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+_COMPRESSIBLE = {
+    "application/json", "application/x-ndjson", "application/javascript",
+    "text/csv", "text/css", "text/html", "text/javascript", "text/plain",
+}
+
+
+def choose_encoding(streamed: bool = False) -> str | None:
+    """The encoding to send this request's response in, or None for identity."""
+    accepted = request.accept_encodings
+    if brotli is not None and not streamed and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.flush()
+
+
+def _encode(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, GZIP_LEVEL)
+
+
+def encode_variants(data: bytes, mimetype: str) -> dict:
+    """data in every encoding compress_response could pick for it: {encoding: body}.
+
+    None maps to data itself.
+    """
+    bodies = {None: data}
+    if mimetype in _COMPRESSIBLE and len(data) >= MIN_SIZE:
+        bodies["gzip"] = _encode(data, "gzip")
+        if brotli is not None:
+            bodies["br"] = _encode(data, "br")
+    return bodies
+
+
+def mark_encoded(response: Response, encoding: str) -> None:
+    """Label a response whose body is already encoding-encoded."""
+    response.vary.add("Accept-Encoding")
+    response.headers["Content-Encoding"] = encoding
+    # Encoded bodies differ byte-wise, so the tag can only claim weak equality
+    etag, _ = response.get_etag()
+    if etag:
+        response.set_etag(etag, weak=True)
+
+
+def compress_response(response: Response) -> Response:
+    """after_request hook: encode a compressible response if the client accepts it."""
+    if (response.status_code != 200 or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in _COMPRESSIBLE):
+        return response
+    response.vary.add("Accept-Encoding")
+
+    encoding = choose_encoding(streamed=response.is_streamed)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _gzip_chunks(response.response)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_SIZE:
+            return response
+        response.set_data(_encode(data, encoding))
+    mark_encoded(response, encoding)
+    return response
+
+
+def _load_static(folder: Path) -> dict:
+    """Read every static file once: {filename: (hash, mimetype, {encoding: body})}."""
+    assets = {}
+    for path in folder.rglob("*"):
+        if not path.is_file():
+            continue
+        data = path.read_bytes()
+        mimetype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        bodies = {None: data}
+        if mimetype in _COMPRESSIBLE:
+            bodies["gzip"] = gzip.compress(data, 9)
+            if brotli is not None:
+                bodies["br"] = brotli.compress(data, quality=11)
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        assets[path.relative_to(folder).as_posix()] = (digest, mimetype, bodies)
+    return assets
+
+
+def init_app(app: Flask) -> None:
+    app.after_request(compress_response)
+    if app.debug or not app.static_folder:
+        return
+
+    assets = _load_static(Path(app.static_folder))
+    send_static = app.view_functions["static"]
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        if endpoint == "static" and values.get("filename") in assets:
+            values["v"] = assets[values["filename"]][0]
+
+    def serve_static(filename):
+        if filename not in assets:
+            return send_static(filename=filename)
+        digest, mimetype, bodies = assets[filename]
+
+        if request.if_none_match.contains_weak(digest):
+            response = Response(status=304)
+        else:
+            encoding = choose_encoding()
+            if encoding not in bodies:
+                encoding = "gzip" if "gzip" in bodies and request.accept_encodings["gzip"] else None
+            response = Response(bodies[encoding], mimetype=mimetype)
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+        if len(bodies) > 1:
+            response.vary.add("Accept-Encoding")
+        response.set_etag(digest)
+        if request.args.get("v") == digest:
+            response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE}, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    app.view_functions["static"] = serve_static
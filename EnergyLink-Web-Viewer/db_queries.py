@@ -1,6 +1,7 @@
 """SQL query layer for EnergyLink Web Viewer. All DB access goes through here."""
 
 import sqlite3
+from typing import Iterator
 
 
 _MONTH_NUM = {
@@ -9,10 +10,79 @@ _MONTH_NUM = {
     'Sep': '09', 'Oct': '10', 'Nov': '11', 'Dec': '12'
 }
 
-# SQL expression to convert "Mon YY" to "20YY-MM" for chronological comparison
-_DATE_SORT_EXPR = (
-    "('20' || SUBSTR(sd.production_date, 5, 2) || '-' || "
-    "CASE SUBSTR(sd.production_date, 1, 3) "
+# Date filters and ordering use statement_details.production_month ('YYYY-MM',
+# filled by the scraper at insert time), which is indexed together with
+# statement_id, so a date range is an index range scan. On a database the
+# scraper hasn't migrated yet, the raw queries derive it from production_date
+# with _LEGACY_MONTH_SQL instead.
+
+
+class SchemaError(Exception):
+    """The database lacks tables the viewer reads; running the scraper creates them."""
+
+
+# Tables every query reads, present since the first scraper release
+_BASE_TABLES = ("invoices", "properties", "statement_details")
+_DIMENSION_TABLES = ("dim_operators", "dim_properties", "dim_categories", "dim_months")
+
+# id(connection) -> (PRAGMA schema_version, schema); see _schema
+_schemas = {}
+_MAX_SCHEMAS = 64
+
+
+def _schema(conn: sqlite3.Connection) -> dict:
+    """What the scraper has created so far: {"production_month", "dimensions", "cube"}.
+
+    Detected once per connection, and again only when PRAGMA schema_version
+    moves (the scraper created or migrated tables). Raises SchemaError if a
+    base table is missing.
+    """
+    version = conn.execute("PRAGMA schema_version").fetchone()[0]
+    cached = _schemas.get(id(conn))
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    missing = [t for t in _BASE_TABLES if t not in tables]
+    if missing:
+        raise SchemaError(f"Database has no {', '.join(missing)} table(s); "
+                          "run the scraper to create or migrate it")
+    columns = {r[1] for r in conn.execute("PRAGMA table_info(statement_details)")}
+    schema = {
+        "production_month": "production_month" in columns,
+        "dimensions": all(t in tables for t in _DIMENSION_TABLES),
+        "cube": "detail_cube" in tables,
+    }
+    if len(_schemas) >= _MAX_SCHEMAS:
+        _schemas.clear()
+    _schemas[id(conn)] = (version, schema)
+    return schema
+
+
+def check_schema(conn: sqlite3.Connection) -> None:
+    """Raise SchemaError unless the viewer can query this database."""
+    _schema(conn)
+
+
+def _to_sortable_date(mon_yy: str) -> str:
+    """Convert 'Mon YY' to '20YY-MM' to compare against production_month."""
+    parts = mon_yy.split(' ')
+    return f"20{parts[1]}-{_MONTH_NUM[parts[0]]}"
+
+
+# Filter columns for queries over statement_details JOIN properties JOIN invoices
+_DETAIL_COLUMNS = {
+    "operator": "i.operator",
+    "month": "sd.production_month",
+    "property": "p.description",
+    "category": "sd.product_category",
+}
+
+# 'Mon YY' production_date as 'YYYY-MM' (NULL if it isn't one), for databases
+# from before the scraper stored production_month
+_LEGACY_MONTH_SQL = (
+    "('20' || SUBSTR(production_date, 5, 2) || '-' || "
+    "CASE SUBSTR(production_date, 1, 3) "
     "WHEN 'Jan' THEN '01' WHEN 'Feb' THEN '02' WHEN 'Mar' THEN '03' "
     "WHEN 'Apr' THEN '04' WHEN 'May' THEN '05' WHEN 'Jun' THEN '06' "
     "WHEN 'Jul' THEN '07' WHEN 'Aug' THEN '08' WHEN 'Sep' THEN '09' "
@@ -21,13 +91,33 @@ _DATE_SORT_EXPR = (
 )
 
 
-def _to_sortable_date(mon_yy: str) -> str:
-    """Convert 'Mon YY' to '20YY-MM' for chronological comparison."""
-    parts = mon_yy.split(' ')
-    return f"20{parts[1]}-{_MONTH_NUM[parts[0]]}"
+def _statement_details(conn: sqlite3.Connection) -> str:
+    """statement_details, or on an unmigrated database a subquery adding production_month."""
+    if _schema(conn)["production_month"]:
+        return "statement_details"
+    return f"(SELECT *, {_LEGACY_MONTH_SQL} AS production_month FROM statement_details)"
+
+
+def _detail_from(conn: sqlite3.Connection) -> str:
+    """The line-item join behind the raw details queries."""
+    return f"""
+    FROM {_statement_details(conn)} sd
+    JOIN properties p ON sd.statement_id = p.statement_id
+    JOIN invoices i ON p.invoice_id = i.invoice_id
+"""
+
+# Filter columns for queries over the scraper-maintained detail_cube table.
+# The cube stores an unparsed month as ''; NULLIF keeps date filters from
+# matching it, as they don't match the line items' NULL.
+_CUBE_COLUMNS = {
+    "operator": "c.operator",
+    "month": "NULLIF(c.production_month, '')",
+    "property": "c.property",
+    "category": "c.category",
+}
 
 
-def _build_where(filters: dict) -> tuple[str, list]:
+def _build_where(filters: dict, columns: dict = _DETAIL_COLUMNS) -> tuple[str, list]:
     """Build a dynamic WHERE clause from filter params.
 
     Returns (where_clause, params) where where_clause includes 'WHERE' if non-empty.
@@ -37,25 +127,25 @@ def _build_where(filters: dict) -> tuple[str, list]:
 
     if filters.get("operators"):
         placeholders = ",".join("?" for _ in filters["operators"])
-        clauses.append(f"i.operator IN ({placeholders})")
+        clauses.append(f"{columns['operator']} IN ({placeholders})")
         params.extend(filters["operators"])
 
     if filters.get("date_start"):
-        clauses.append(f"{_DATE_SORT_EXPR} >= ?")
+        clauses.append(f"{columns['month']} >= ?")
         params.append(_to_sortable_date(filters["date_start"]))
 
     if filters.get("date_end"):
-        clauses.append(f"{_DATE_SORT_EXPR} <= ?")
+        clauses.append(f"{columns['month']} <= ?")
         params.append(_to_sortable_date(filters["date_end"]))
 
     if filters.get("properties"):
         placeholders = ",".join("?" for _ in filters["properties"])
-        clauses.append(f"p.description IN ({placeholders})")
+        clauses.append(f"{columns['property']} IN ({placeholders})")
         params.extend(filters["properties"])
 
     if filters.get("categories"):
         placeholders = ",".join("?" for _ in filters["categories"])
-        clauses.append(f"sd.product_category IN ({placeholders})")
+        clauses.append(f"{columns['category']} IN ({placeholders})")
         params.extend(filters["categories"])
 
     where = " WHERE " + " AND ".join(clauses) if clauses else ""
@@ -93,74 +183,167 @@ EXPENSE_GROUPS = {
 }
 
 
+_GROUP_COLUMNS = [g.lower().replace(" ", "_") for g in EXPENSE_GROUPS]
+
+# Keys of each get_monthly_rollup row, in export order
+MONTHLY_COLUMNS = [
+    "production_date", "production_month", "revenue", "volume", "avg_price",
+    "total_expenses", *(f"{g}_expense" for g in _GROUP_COLUMNS),
+    "revenue_per_mcf", "total_expenses_per_mcf", "net_per_mcf",
+    *(f"{g}_per_mcf" for g in _GROUP_COLUMNS),
+]
+
+
 def get_filter_options(conn: sqlite3.Connection) -> dict:
-    """Get distinct values for all filter dropdowns."""
-    operators = [r[0] for r in conn.execute(
-        "SELECT DISTINCT operator FROM invoices ORDER BY operator"
-    )]
-    properties = [r[0] for r in conn.execute(
-        "SELECT DISTINCT description FROM properties ORDER BY description"
-    )]
-    categories = [r[0] for r in conn.execute(
-        "SELECT DISTINCT product_category FROM statement_details ORDER BY product_category"
-    )]
-    dates = conn.execute(
-        "SELECT MIN(production_date), MAX(production_date) FROM statement_details"
-    ).fetchone()
-
-    # Get all distinct production dates for the date dropdowns (sorted)
-    all_dates = [r[0] for r in conn.execute(
-        "SELECT DISTINCT production_date FROM statement_details ORDER BY production_date"
-    )]
+    """Get distinct values for all filter dropdowns.
+
+    Reads the scraper-maintained dim_* tables, whose primary keys keep the
+    values sorted, or scans the stored rows on a database without them.
+    Dates come back in chronological order.
+    """
+    if _schema(conn)["dimensions"]:
+        operators = [r[0] for r in conn.execute("SELECT name FROM dim_operators ORDER BY name")]
+        properties = [r[0] for r in conn.execute("SELECT name FROM dim_properties ORDER BY name")]
+        categories = [r[0] for r in conn.execute("SELECT name FROM dim_categories ORDER BY name")]
+        all_dates = [r[0] for r in conn.execute(
+            "SELECT production_date FROM dim_months ORDER BY production_month"
+        )]
+    else:
+        operators = [r[0] for r in conn.execute(
+            "SELECT DISTINCT operator FROM invoices WHERE operator IS NOT NULL ORDER BY operator"
+        )]
+        properties = [r[0] for r in conn.execute(
+            """SELECT DISTINCT description FROM properties WHERE description IS NOT NULL
+               ORDER BY description"""
+        )]
+        categories = [r[0] for r in conn.execute(
+            """SELECT DISTINCT product_category FROM statement_details
+               WHERE product_category IS NOT NULL ORDER BY product_category"""
+        )]
+        all_dates = [r[0] for r in conn.execute(
+            f"""SELECT MIN(production_date) FROM {_statement_details(conn)}
+                WHERE production_month IS NOT NULL
+                GROUP BY production_month ORDER BY production_month"""
+        )]
 
     return {
         "operators": operators,
         "properties": properties,
         "categories": categories,
-        "date_min": dates[0],
-        "date_max": dates[1],
+        "date_min": all_dates[0] if all_dates else None,
+        "date_max": all_dates[-1] if all_dates else None,
         "all_dates": all_dates,
     }
 
 
-def get_monthly_rollup(conn: sqlite3.Connection, filters: dict = None) -> list[dict]:
-    """Get monthly aggregated data with $/MCF calculations.
+# Filters detail_cube can answer; any other filter needs the line items
+_CUBE_FILTERS = {"operators", "properties", "categories", "date_start", "date_end"}
+
+# Column expressions for aggregating either source the same way. The cube
+# stores a missing key as '', the raw rows as NULL; month reads both as NULL.
+# production_date is stored as is in both. The raw "from" depends on the schema; see _source.
+_MONTHLY_SOURCES = {
+    "cube": {
+        "from": "FROM detail_cube c",
+        "columns": _CUBE_COLUMNS,
+        "month": "NULLIF(c.production_month, '')",
+        "date": "c.production_date",
+        "type": "c.type_description",
+        "value": "c.owner_value",
+        "abs_value": "c.abs_owner_value",
+        "volume": "c.owner_volume",
+        "price_sum": "c.price_sum",
+        "price_count": "c.price_count",
+    },
+    "raw": {
+        "columns": _DETAIL_COLUMNS,
+        "month": "sd.production_month",
+        "date": "sd.production_date",
+        "type": "sd.type_description",
+        "value": "sd.owner_value",
+        "abs_value": "ABS(sd.owner_value)",
+        "volume": "sd.owner_volume",
+        "price_sum": "sd.property_price",
+        "price_count": "(sd.property_price IS NOT NULL)",
+    },
+}
 
-    Groups by production_date and computes revenue, volume, expense breakdowns.
+
+def plan_source(conn: sqlite3.Connection, filters: dict) -> str:
+    """Pick where aggregates for filters come from: "cube", or "raw" line items.
+
+    The cube answers every dashboard filter; raw rows are only needed for a
+    filter on a column it doesn't keep, or a database without detail_cube
+    (one the scraper hasn't opened since it was added).
     """
-    filters = filters or {}
-    where, params = _build_where(filters)
+    if any(value and name not in _CUBE_FILTERS for name, value in filters.items()):
+        return "raw"
+    return "cube" if _schema(conn)["cube"] else "raw"
+
+
+def _source(conn: sqlite3.Connection, filters: dict) -> dict:
+    """The _MONTHLY_SOURCES entry plan_source picks, with its FROM clause."""
+    name = plan_source(conn, filters)
+    if name == "cube":
+        return _MONTHLY_SOURCES["cube"]
+    return {**_MONTHLY_SOURCES["raw"], "from": _detail_from(conn)}
 
-    # Build expense group CASE expressions
+
+_REVENUE_TYPES = "('ROYALTY INTEREST', 'RI')"
+
+# Every type but revenue counts toward total_expenses, including a blank ''
+# type. The cube folds a NULL type into '' too, which only matters for rows
+# the parser never produces: it stores a blank type cell as ''.
+_TOTAL_EXPENSES_SQL = """SUM(CASE WHEN {type} NOT IN ('ROYALTY INTEREST', 'RI')
+                THEN {abs_value} ELSE 0 END)"""
+
+
+def _expense_group_sums(src: dict) -> str:
+    """SELECT columns summing each EXPENSE_GROUPS group as <group>_expense."""
     expense_cols = []
     for group_name, types in EXPENSE_GROUPS.items():
         placeholders = ",".join(f"'{t}'" for t in types)
         col_name = group_name.lower().replace(" ", "_")
         expense_cols.append(
-            f"SUM(CASE WHEN sd.type_description IN ({placeholders}) "
-            f"THEN ABS(sd.owner_value) ELSE 0 END) as {col_name}_expense"
+            f"SUM(CASE WHEN {src['type']} IN ({placeholders}) "
+            f"THEN {src['abs_value']} ELSE 0 END) as {col_name}_expense"
         )
+    return ",\n        ".join(expense_cols)
 
-    expense_sql = ",\n        ".join(expense_cols)
+
+def get_monthly_rollup(conn: sqlite3.Connection, filters: dict = None) -> list[dict]:
+    """Get monthly aggregated data with $/MCF calculations.
+
+    Groups by production month (chronologically) and computes revenue,
+    volume, expense breakdowns. A production_date that isn't a 'Mon YY'
+    month gets its own row, with production_month None, after the months.
+    Reads detail_cube, which the scraper keeps pre-summed per month,
+    operator, property, category and type, unless plan_source says the line
+    items are needed.
+    """
+    filters = filters or {}
+    src = _source(conn, filters)
+    where, params = _build_where(filters, src["columns"])
+
+    expense_sql = _expense_group_sums(src)
 
     sql = f"""
         SELECT
-            sd.production_date,
-            SUM(CASE WHEN sd.type_description IN ('ROYALTY INTEREST', 'RI')
-                THEN sd.owner_value ELSE 0 END) as revenue,
-            SUM(CASE WHEN sd.type_description IN ('ROYALTY INTEREST', 'RI')
-                THEN sd.owner_volume ELSE 0 END) as volume,
-            AVG(CASE WHEN sd.type_description IN ('ROYALTY INTEREST', 'RI')
-                THEN sd.property_price END) as avg_price,
-            SUM(CASE WHEN sd.type_description NOT IN ('ROYALTY INTEREST', 'RI')
-                THEN ABS(sd.owner_value) ELSE 0 END) as total_expenses,
+            MIN({src['date']}) as production_date,
+            {src['month']} as production_month,
+            SUM(CASE WHEN {src['type']} IN {_REVENUE_TYPES}
+                THEN {src['value']} ELSE 0 END) as revenue,
+            SUM(CASE WHEN {src['type']} IN {_REVENUE_TYPES}
+                THEN {src['volume']} ELSE 0 END) as volume,
+            SUM(CASE WHEN {src['type']} IN {_REVENUE_TYPES} THEN {src['price_sum']} END)
+                / NULLIF(SUM(CASE WHEN {src['type']} IN {_REVENUE_TYPES}
+                             THEN {src['price_count']} ELSE 0 END), 0) as avg_price,
+            {_TOTAL_EXPENSES_SQL.format(**src)} as total_expenses,
             {expense_sql}
-        FROM statement_details sd
-        JOIN properties p ON sd.statement_id = p.statement_id
-        JOIN invoices i ON p.invoice_id = i.invoice_id
+        {src['from']}
         {where}
-        GROUP BY sd.production_date
-        ORDER BY sd.production_date
+        GROUP BY {src['month']}, CASE WHEN {src['month']} IS NULL THEN {src['date']} END
+        ORDER BY {src['month']} IS NULL, {src['month']}, production_date
     """
 
     rows = conn.execute(sql, params).fetchall()
@@ -183,34 +366,187 @@ def get_monthly_rollup(conn: sqlite3.Connection, filters: dict = None) -> list[d
     return result
 
 
-def get_raw_details(conn: sqlite3.Connection, filters: dict = None) -> list[dict]:
-    """Get all statement detail rows with JOINed property/invoice info."""
+def get_economics_cells(conn: sqlite3.Connection, filters: dict = None) -> list[tuple]:
+    """Get revenue, volume and expense sums per operator, property and month.
+
+    Each row is (operator, property, production_month, revenue, volume,
+    total_expenses, *<group>_expense in EXPENSE_GROUPS order), summed the
+    same way as get_monthly_rollup and from the source plan_source picks.
+    Dates that aren't a 'Mon YY' month are left out, having no place on a
+    month axis.
+    """
     filters = filters or {}
-    where, params = _build_where(filters)
+    src = _source(conn, filters)
+    where, params = _build_where(filters, src["columns"])
+    where += (" AND " if where else " WHERE ") + f"{src['month']} IS NOT NULL"
 
     sql = f"""
         SELECT
-            sd.production_date,
-            i.operator,
-            p.description as property,
-            sd.product_category as category,
-            sd.code,
-            sd.type_description,
-            sd.property_volume as volume,
-            sd.property_price as price,
-            sd.property_value as value,
-            sd.owner_pct,
-            sd.owner_volume,
-            sd.owner_value,
-            sd.btu
-        FROM statement_details sd
-        JOIN properties p ON sd.statement_id = p.statement_id
-        JOIN invoices i ON p.invoice_id = i.invoice_id
+            {src['columns']['operator']},
+            {src['columns']['property']},
+            {src['month']},
+            SUM(CASE WHEN {src['type']} IN {_REVENUE_TYPES}
+                THEN {src['value']} ELSE 0 END),
+            SUM(CASE WHEN {src['type']} IN {_REVENUE_TYPES}
+                THEN {src['volume']} ELSE 0 END),
+            {_TOTAL_EXPENSES_SQL.format(**src)},
+            {_expense_group_sums(src)}
+        {src['from']}
         {where}
-        ORDER BY sd.production_date, i.operator, p.description
+        GROUP BY 1, 2, 3
+    """
+    return conn.execute(sql, params).fetchall()
+
+
+# Column list shared by the raw details queries
+_RAW_DETAIL_SELECT = """
+    SELECT
+        sd.production_date,
+        i.operator,
+        p.description as property,
+        sd.product_category as category,
+        sd.code,
+        sd.type_description,
+        sd.property_volume as volume,
+        sd.property_price as price,
+        sd.property_value as value,
+        sd.owner_pct,
+        sd.owner_volume,
+        sd.owner_value,
+        sd.btu
+"""
+
+RAW_DETAIL_COLUMNS = [
+    "production_date", "operator", "property", "category", "code",
+    "type_description", "volume", "price", "value", "owner_pct",
+    "owner_volume", "owner_value", "btu",
+]
+
+# Every stored detail, property and invoice field, for the full export
+EXPORT_COLUMNS = [
+    "invoice_id", "operator", "owner_number", "check_number", "invoice_date",
+    "op_acct_month", "statement_id", "cost_center", "property", "state", "county",
+    "production_date", "production_month", "category", "code", "type_description",
+    "btu", "property_volume", "property_price", "property_value", "owner_pct",
+    "distribution_pct", "owner_volume", "owner_value",
+]
+
+_EXPORT_SELECT = """
+    SELECT
+        i.invoice_id, i.operator, i.owner_number, i.check_number, i.invoice_date,
+        i.op_acct_month, p.statement_id, p.cost_center, p.description as property,
+        p.state, p.county, sd.production_date, sd.production_month,
+        sd.product_category as category, sd.code, sd.type_description, sd.btu,
+        sd.property_volume, sd.property_price, sd.property_value, sd.owner_pct,
+        sd.distribution_pct, sd.owner_volume, sd.owner_value
+"""
+
+def iter_raw_details(conn: sqlite3.Connection, filters: dict = None) -> Iterator[tuple]:
+    """Yield statement detail rows (in RAW_DETAIL_COLUMNS order) straight from the cursor."""
+    where, params = _build_where(filters or {})
+    sql = f"""{_RAW_DETAIL_SELECT} {_detail_from(conn)} {where}
+              ORDER BY sd.production_month, i.operator, p.description"""
+    yield from conn.execute(sql, params)
+
+
+def iter_export_rows(conn: sqlite3.Connection, filters: dict = None) -> Iterator[tuple]:
+    """Yield full export rows (in EXPORT_COLUMNS order) straight from the cursor."""
+    where, params = _build_where(filters or {})
+    sql = f"""{_EXPORT_SELECT} {_detail_from(conn)} {where}
+              ORDER BY sd.production_month, i.operator, p.description, sd.id"""
+    yield from conn.execute(sql, params)
+
+
+INVOICE_COLUMNS = [
+    "invoice_id", "doc_type", "operator", "owner_number", "check_number",
+    "invoice_date", "op_acct_month", "received_date", "status",
+    "total_revenue", "total_tax", "total_deductions", "total_amount",
+]
+
+
+def iter_invoice_headers(conn: sqlite3.Connection, filters: dict = None) -> Iterator[tuple]:
+    """Yield invoice header rows (in INVOICE_COLUMNS order) straight from the cursor.
+
+    With filters, only invoices having a matching statement detail are included.
+    """
+    where, params = _build_where(filters or {})
+    sql = f"SELECT {', '.join(INVOICE_COLUMNS)} FROM invoices"
+    if where:
+        sql += f" WHERE invoice_id IN (SELECT p.invoice_id {_detail_from(conn)} {where})"
+    yield from conn.execute(sql + " ORDER BY invoice_date DESC, operator", params)
+
+
+def get_raw_details(conn: sqlite3.Connection, filters: dict = None) -> list[dict]:
+    """Get all statement detail rows with JOINed property/invoice info."""
+    return [dict(row) for row in iter_raw_details(conn, filters)]
+
+
+# Sortable columns of the details table, keyed by the names get_raw_details returns
+DETAIL_SORT_COLUMNS = {
+    "production_date": "sd.production_month",
+    "operator": "i.operator",
+    "property": "p.description",
+    "category": "sd.product_category",
+    "code": "sd.code",
+    "type_description": "sd.type_description",
+    "volume": "sd.property_volume",
+    "price": "sd.property_price",
+    "value": "sd.property_value",
+    "owner_pct": "sd.owner_pct",
+    "owner_volume": "sd.owner_volume",
+    "owner_value": "sd.owner_value",
+    "btu": "sd.btu",
+}
+
+# Text columns matched by the details table's search box
+_DETAIL_SEARCH_COLUMNS = [
+    "sd.production_date", "i.operator", "p.description",
+    "sd.product_category", "sd.code", "sd.type_description",
+]
+
+
+def get_raw_details_page(conn: sqlite3.Connection, filters: dict = None,
+                         start: int = 0, length: int = 25,
+                         order: list[tuple[str, str]] = None,
+                         search: str = "") -> dict:
+    """Get one page of statement detail rows, sorted and searched in SQLite.
+
+    order is a list of (column, "asc" | "desc") pairs using DETAIL_SORT_COLUMNS
+    names; unknown columns are ignored. A negative length returns every row.
+    Returns {"total", "filtered", "data"}: the row count under the filters,
+    the count after the search, and the requested page.
     """
+    filters = filters or {}
+    where, params = _build_where(filters)
+    from_sql = _detail_from(conn) + where
+    total = conn.execute(f"SELECT COUNT(*) {from_sql}", params).fetchone()[0]
+
+    filtered = total
+    if search:
+        pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        matches = " OR ".join(f"{col} LIKE ? ESCAPE '\\'" for col in _DETAIL_SEARCH_COLUMNS)
+        from_sql += (" AND " if where else " WHERE ") + f"({matches})"
+        params = params + [pattern] * len(_DETAIL_SEARCH_COLUMNS)
+        filtered = conn.execute(f"SELECT COUNT(*) {from_sql}", params).fetchone()[0]
+
+    order_terms = [
+        f"{DETAIL_SORT_COLUMNS[col]} {'DESC' if direction == 'desc' else 'ASC'}"
+        for col, direction in order or [] if col in DETAIL_SORT_COLUMNS
+    ]
+    # Default order matches get_raw_details; sd.id keeps pages stable across ties
+    order_terms = order_terms or ["sd.production_month", "i.operator", "p.description"]
+    order_terms.append("sd.id")
+
+    sql = f"""{_RAW_DETAIL_SELECT} {from_sql}
+              ORDER BY {", ".join(order_terms)}
+              LIMIT ? OFFSET ?"""
+    rows = conn.execute(sql, params + [length if length >= 0 else -1, max(start, 0)])
 
-    return [dict(row) for row in conn.execute(sql, params)]
+    return {
+        "total": total,
+        "filtered": filtered,
+        "data": [dict(row) for row in rows],
+    }
 
 
 def get_invoice_list(conn: sqlite3.Connection) -> list[dict]:
@@ -226,35 +562,57 @@ def get_invoice_list(conn: sqlite3.Connection) -> list[dict]:
     return [dict(row) for row in conn.execute(sql)]
 
 
+# Invoice ids per IN (...) list, well under SQLite's bound-parameter limit
+_INVOICE_BATCH = 500
+
+
+def get_invoice_details(conn: sqlite3.Connection, invoice_ids: list[int]) -> list[dict]:
+    """Get full invoice details (properties and statement details) for several invoices.
+
+    Runs two set-based queries per batch of ids, invoices then properties
+    joined to their details, and nests the rows in one pass. Invoices come
+    back in the order asked for; unknown ids are left out.
+    """
+    invoice_ids = list(dict.fromkeys(invoice_ids))
+    invoices = {}
+
+    for i in range(0, len(invoice_ids), _INVOICE_BATCH):
+        batch = invoice_ids[i:i + _INVOICE_BATCH]
+        placeholders = ",".join("?" for _ in batch)
+
+        for row in conn.execute(
+            f"SELECT * FROM invoices WHERE invoice_id IN ({placeholders})", batch
+        ):
+            invoices[row["invoice_id"]] = {**dict(row), "properties": []}
+
+        # The NULL marker column splits each row into its property and detail halves
+        cursor = conn.execute(
+            f"""SELECT p.*, NULL AS _details, sd.*
+                FROM properties p
+                LEFT JOIN statement_details sd ON sd.statement_id = p.statement_id
+                WHERE p.invoice_id IN ({placeholders})
+                ORDER BY p.invoice_id, p.description, p.id,
+                         sd.product_category, sd.type_description""",
+            batch,
+        )
+        names = [d[0] for d in cursor.description]
+        split = names.index("_details")
+        prop_names, detail_names = names[:split], names[split + 1:]
+
+        prop = None
+        for row in cursor:
+            if prop is None or prop["id"] != row[0]:
+                prop = dict(zip(prop_names, row[:split]))
+                prop["details"] = []
+                invoices[prop["invoice_id"]]["properties"].append(prop)
+            # A property with no details yet joins to one all-NULL detail
+            if row[split + 1] is not None:
+                prop["details"].append(dict(zip(detail_names, row[split + 1:])))
+
+    return [invoices[i] for i in invoice_ids if i in invoices]
+
+
 def get_invoice_detail(conn: sqlite3.Connection, invoice_id: int) -> dict | None:
     """Get full invoice detail with properties and statement details."""
-    # Invoice header
-    invoice = conn.execute(
-        "SELECT * FROM invoices WHERE invoice_id = ?", (invoice_id,)
-    ).fetchone()
-    if not invoice:
-        return None
-
-    invoice_dict = dict(invoice)
-
-    # Properties for this invoice
-    properties = conn.execute(
-        """SELECT * FROM properties WHERE invoice_id = ?
-           ORDER BY description""",
-        (invoice_id,)
-    ).fetchall()
-
-    props = []
-    for prop in properties:
-        p = dict(prop)
-        # Statement details for this property
-        details = conn.execute(
-            """SELECT * FROM statement_details WHERE statement_id = ?
-               ORDER BY product_category, type_description""",
-            (prop["statement_id"],)
-        ).fetchall()
-        p["details"] = [dict(d) for d in details]
-        props.append(p)
-
-    invoice_dict["properties"] = props
-    return invoice_dict
+    found = get_invoice_details(conn, [invoice_id])
+    return found[0] if found else None
@@ -0,0 +1,91 @@
+"""Production serving for the viewer: a fixed pool of request threads.
+
+Uses waitress when it is installed. Otherwise requests are accepted by
+werkzeug's WSGI server and handled on a bounded thread pool; Flask's own
+threaded dev server starts a new thread per request with no limit.
+
+SIGINT and SIGTERM stop accepting connections, let in-flight requests
+finish, and close the pooled DB connections.
+"""
+
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer
+
+import app as viewer
+
+try:
+    import waitress
+except ImportError:  # fall back to werkzeug plus a thread pool
+    waitress = None
+
+DEFAULT_THREADS = 8
+
+
+class _PooledWSGIServer(BaseWSGIServer):
+    """werkzeug server that handles each connection on a fixed-size thread pool."""
+
+    multithread = True
+
+    def __init__(self, host: str, port: int, app, threads: int):
+        super().__init__(host, port, app)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="viewer")
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        # Let requests already accepted run to completion
+        self.executor.shutdown(wait=True)
+
+
+class Server:
+    """The viewer app behind waitress or _PooledWSGIServer, on threads threads."""
+
+    def __init__(self, app, host: str, port: int, threads: int = DEFAULT_THREADS):
+        self.threads = threads
+        # One read connection per request thread, kept warm between requests
+        viewer.set_pool_size(threads)
+        if waitress is not None:
+            self._server = waitress.create_server(app, host=host, port=port, threads=threads)
+            self.port = self._server.effective_port
+        else:
+            self._server = _PooledWSGIServer(host, port, app, threads)
+            self.port = self._server.server_port
+
+    @property
+    def engine(self) -> str:
+        return "waitress" if waitress is not None else "werkzeug"
+
+    def run(self) -> None:
+        """Serve until SIGINT or SIGTERM (or forever, off the main thread)."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, _raise_system_exit)
+        try:
+            if waitress is not None:
+                # waitress drains its task threads itself on SystemExit/KeyboardInterrupt
+                self._server.run()
+            else:
+                try:
+                    self._server.serve_forever()
+                except (KeyboardInterrupt, SystemExit):
+                    pass
+                finally:
+                    self._server.server_close()
+        finally:
+            viewer.close_pool()
+
+
+def _raise_system_exit(signum, frame):
+    raise SystemExit(0)
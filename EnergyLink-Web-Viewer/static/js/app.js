@@ -4,23 +4,26 @@
 
 let filterChoices = {};
 
-// Month sort helper: converts "Mon YY" to sortable "YYYY-MM"
-const MONTH_MAP = {
-    Jan: "01", Feb: "02", Mar: "03", Apr: "04", May: "05", Jun: "06",
-    Jul: "07", Aug: "08", Sep: "09", Oct: "10", Nov: "11", Dec: "12"
-};
-
-function monthSortKey(dateStr) {
-    if (!dateStr) return "";
-    const parts = dateStr.split(" ");
-    if (parts.length !== 2) return dateStr;
-    const mon = MONTH_MAP[parts[0]] || "00";
-    const yr = parts[1].length === 2 ? "20" + parts[1] : parts[1];
-    return yr + "-" + mon;
+// Decode a ?format=columnar payload to { column: [values] }, expanding
+// dictionary-encoded columns ({ values, codes }) back to plain arrays
+function decodeColumnar(payload) {
+    const cols = {};
+    for (const [name, col] of Object.entries(payload.columns)) {
+        cols[name] = Array.isArray(col) ? col : col.codes.map(c => col.values[c]);
+    }
+    return cols;
 }
 
-function sortByMonth(a, b) {
-    return monthSortKey(a).localeCompare(monthSortKey(b));
+// Row objects from decoded columns, for DataTables
+function columnarRows(cols, length) {
+    const names = Object.keys(cols);
+    const rows = new Array(length);
+    for (let i = 0; i < length; i++) {
+        const row = {};
+        names.forEach(n => { row[n] = cols[n][i]; });
+        rows[i] = row;
+    }
+    return rows;
 }
 
 // Initialize filter dropdowns with Choices.js
@@ -46,11 +49,10 @@ function initFilters(options) {
         options.categories.map(c => ({ value: c, label: c })), "value", "label", true
     );
 
-    // Date range dropdowns - sort chronologically
-    const sortedDates = [...options.all_dates].sort(sortByMonth);
+    // Date range dropdowns - dates arrive in chronological order
     const startSel = document.getElementById("filter-date-start");
     const endSel = document.getElementById("filter-date-end");
-    sortedDates.forEach(d => {
+    options.all_dates.forEach(d => {
         startSel.add(new Option(d, d));
         endSel.add(new Option(d, d));
     });
@@ -81,21 +83,15 @@ function getFilterParams() {
 // Fetch and render dashboard data
 async function loadDashboard() {
     const qs = getFilterParams();
-    const [monthlyRes, detailsRes] = await Promise.all([
-        fetch("/api/dashboard/monthly?" + qs),
-        fetch("/api/dashboard/details?" + qs)
-    ]);
-
-    const monthly = await monthlyRes.json();
-    const details = await detailsRes.json();
-
-    // Sort monthly data chronologically
-    monthly.sort((a, b) => sortByMonth(a.production_date, b.production_date));
+    const monthlyRes = await fetch("/api/dashboard/monthly?format=columnar&" + qs);
+    const payload = await monthlyRes.json();
+    const monthly = decodeColumnar(payload);
 
+    // Months arrive in chronological order from the server
     renderLineChart(monthly);
     renderComboChart(monthly);
-    renderRollupTable(monthly);
-    renderRawTable(details);
+    renderRollupTable(columnarRows(monthly, payload.length));
+    renderRawTable(qs);
 }
 
 // Reset filters
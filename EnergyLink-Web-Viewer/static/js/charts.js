@@ -41,18 +41,19 @@ function buildLineToggles() {
     });
 }
 
+// data is the decoded columnar monthly rollup: { column: [value per month] }
 function renderLineChart(data) {
     window._lastMonthly = data;
     buildLineToggles();
 
-    const x = data.map(d => d.production_date);
+    const x = data.production_date || [];
     const traces = [];
 
     LINE_SERIES.forEach(s => {
         if (!lineSeriesState[s.key]) return;
         traces.push({
             x: x,
-            y: data.map(d => d[s.key]),
+            y: data[s.key] || [],
             name: s.label,
             type: "scatter",
             mode: "lines+markers",
@@ -122,12 +123,12 @@ function renderComboChart(data) {
     const barLabel = COMBO_OPTIONS.find(o => o.key === barKey)?.label || barKey;
     const lineLabel = COMBO_OPTIONS.find(o => o.key === lineKey)?.label || lineKey;
 
-    const x = data.map(d => d.production_date);
+    const x = data.production_date || [];
 
     const traces = [
         {
             x: x,
-            y: data.map(d => d[barKey]),
+            y: data[barKey] || [],
             name: barLabel,
             type: "bar",
             marker: { color: "#3498db" },
@@ -135,7 +136,7 @@ function renderComboChart(data) {
         },
         {
             x: x,
-            y: data.map(d => d[lineKey]),
+            y: data[lineKey] || [],
             name: lineLabel,
             type: "scatter",
             mode: "lines+markers",
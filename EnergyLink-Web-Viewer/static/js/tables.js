@@ -56,34 +56,58 @@ function renderRollupTable(data) {
     });
 }
 
-function renderRawTable(data) {
+const RAW_COLUMNS = [
+    { data: "production_date", title: "Month" },
+    { data: "operator", title: "Operator" },
+    { data: "property", title: "Property" },
+    { data: "category", title: "Category" },
+    { data: "code", title: "Code" },
+    { data: "type_description", title: "Type" },
+    { data: "volume", title: "Volume", render: (d) => fmtNum(d) },
+    { data: "price", title: "Price", render: (d) => fmtDollar(d) },
+    { data: "value", title: "Value", render: (d) => fmtDollar(d) },
+    { data: "owner_pct", title: "Owner %", render: (d) => fmt(d, 4) },
+    { data: "owner_volume", title: "Owner Vol", render: (d) => fmtNum(d) },
+    { data: "owner_value", title: "Owner Value", render: (d) => fmtDollar(d) },
+];
+
+// Streamed by the server, so large downloads don't pass through the table
+function download(url) {
+    const a = document.createElement("a");
+    a.href = url;
+    a.click();
+}
+
+// Rows are paged, sorted and searched server-side; qs carries the dashboard filters
+function renderRawTable(qs) {
     if (rawDT) {
         rawDT.destroy();
         document.getElementById("raw-table").innerHTML = "";
     }
 
     rawDT = new DataTable("#raw-table", {
-        data: data,
-        columns: [
-            { data: "production_date", title: "Month" },
-            { data: "operator", title: "Operator" },
-            { data: "property", title: "Property" },
-            { data: "category", title: "Category" },
-            { data: "code", title: "Code" },
-            { data: "type_description", title: "Type" },
-            { data: "volume", title: "Volume", render: (d) => fmtNum(d) },
-            { data: "price", title: "Price", render: (d) => fmtDollar(d) },
-            { data: "value", title: "Value", render: (d) => fmtDollar(d) },
-            { data: "owner_pct", title: "Owner %", render: (d) => fmt(d, 4) },
-            { data: "owner_volume", title: "Owner Vol", render: (d) => fmtNum(d) },
-            { data: "owner_value", title: "Owner Value", render: (d) => fmtDollar(d) },
-        ],
+        serverSide: true,
+        ajax: {
+            url: "/api/dashboard/details?format=columnar&" + qs,
+            dataSrc: (json) => columnarRows(decodeColumnar(json.data), json.data.length),
+        },
+        columns: RAW_COLUMNS,
         order: [],
         pageLength: 25,
+        searchDelay: 400,
         layout: {
             topStart: {
                 buttons: [
-                    { extend: "csv", text: "Export CSV", className: "btn btn-sm btn-outline-secondary" }
+                    {
+                        text: "Export CSV",
+                        className: "btn btn-sm btn-outline-secondary",
+                        action: () => download("/api/dashboard/details?format=csv&" + qs),
+                    },
+                    {
+                        text: "Export All Data",
+                        className: "btn btn-sm btn-outline-secondary",
+                        action: () => download("/api/export/details?format=csv"),
+                    }
                 ]
             }
         },
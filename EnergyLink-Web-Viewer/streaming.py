@@ -0,0 +1,76 @@
+"""Streamed NDJSON/CSV responses built straight from a SQLite cursor.
+
+Rows are encoded and sent in small batches while the cursor is read, so
+memory stays flat no matter how many rows a query returns. A stream holds
+its own pooled connection: the request's connection (get_db) is released at
+teardown, before the response body is sent.
+"""
+
+import csv
+import io
+import json
+from typing import Callable, Iterable, Iterator
+
+from flask import Response
+
+from app import acquire_db, release_db
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Rows encoded per chunk written to the socket
+_BATCH_ROWS = 500
+
+
+def _ndjson_chunks(columns: list[str], rows: Iterable[tuple]) -> Iterator[str]:
+    batch = []
+    for row in rows:
+        batch.append(json.dumps(dict(zip(columns, row))))
+        if len(batch) >= _BATCH_ROWS:
+            yield "\n".join(batch) + "\n"
+            batch = []
+    if batch:
+        yield "\n".join(batch) + "\n"
+
+
+def _csv_chunks(columns: list[str], rows: Iterable[tuple]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % _BATCH_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def _run_query(query: Callable, encode: Callable) -> Iterator:
+    conn = acquire_db()
+    try:
+        yield from encode(query(conn))
+    finally:
+        release_db(conn)
+
+
+def stream_response(query: Callable, encode: Callable, mimetype: str,
+                    filename: str = None) -> Response:
+    """Stream encode(query(conn)), a chunk iterator, as the response body.
+
+    query is called with a pooled connection once the body starts streaming;
+    it must not touch the request. filename makes the response a download.
+    """
+    response = Response(_run_query(query, encode), mimetype=mimetype)
+    if filename:
+        response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def stream_query(columns: list[str], query: Callable, fmt: str,
+                 filename: str = None) -> Response:
+    """Stream query(conn)'s rows as NDJSON (one object per line) or CSV (with a header row)."""
+    chunks = _ndjson_chunks if fmt == "ndjson" else _csv_chunks
+    return stream_response(query, lambda rows: chunks(columns, rows), FORMATS[fmt], filename)
@@ -0,0 +1,75 @@
+"""Compressed archive of raw invoice-summary and statement pages.
+
+Every fetched page is stored as compressed HTML keyed by scrape run and ID:
+
+    data/archive/run_<run_id>/invoice_<invoice_id>.html.zst
+    data/archive/run_<run_id>/statement_<statement_id>.html.zst
+
+zstd is used when the optional `zstandard` package is installed, gzip
+otherwise; both are readable regardless of which one wrote the archive.
+With the raw pages on disk, a parser fix can be applied to past data with
+`scraper.py --reparse` instead of re-scraping the portal.
+"""
+
+import gzip
+import re
+from pathlib import Path
+
+import config
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+_NAME_RE = re.compile(r"^(invoice|statement)_(\d+)\.html\.(zst|gz)$")
+
+
+def _run_dir(run_id: int) -> Path:
+    return config.ARCHIVE_DIR / f"run_{run_id}"
+
+
+def save(run_id: int, kind: str, page_id: int, html: str) -> Path:
+    """Compress and store one page. kind is "invoice" or "statement"."""
+    run_dir = _run_dir(run_id)
+    run_dir.mkdir(parents=True, exist_ok=True)
+    data = html.encode("utf-8")
+    if zstandard is not None:
+        path = run_dir / f"{kind}_{page_id}.html.zst"
+        path.write_bytes(zstandard.ZstdCompressor(level=10).compress(data))
+    else:
+        path = run_dir / f"{kind}_{page_id}.html.gz"
+        path.write_bytes(gzip.compress(data, compresslevel=6))
+    return path
+
+
+def load(path: Path) -> str:
+    """Read back a stored page's HTML."""
+    data = Path(path).read_bytes()
+    if str(path).endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed; install the 'zstandard' package")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    else:
+        data = gzip.decompress(data)
+    return data.decode("utf-8")
+
+
+def latest_pages(kind: str) -> dict[int, Path]:
+    """Map each archived ID of the given kind to its most recent page."""
+    latest = {}
+    if not config.ARCHIVE_DIR.exists():
+        return latest
+
+    run_dirs = []
+    for d in config.ARCHIVE_DIR.iterdir():
+        if d.is_dir() and d.name.startswith("run_") and d.name[4:].isdigit():
+            run_dirs.append((int(d.name[4:]), d))
+
+    # Later runs overwrite earlier ones
+    for _, run_dir in sorted(run_dirs):
+        for path in run_dir.iterdir():
+            match = _NAME_RE.match(path.name)
+            if match and match.group(1) == kind:
+                latest[int(match.group(2))] = path
+    return latest
@@ -0,0 +1,253 @@
+"""Asyncio browser automation for EnergyLink scraper using Playwright.
+
+Mirrors browser.py on top of playwright.async_api so many page loads can be
+in flight at once inside one event loop. The sync module remains the default.
+"""
+
+from urllib.parse import urlsplit
+
+from playwright.async_api import async_playwright, BrowserContext, Page
+
+import config
+# The URL checks only read page.url, so the sync ones serve async pages too
+from browser import (
+    MFARequiredError,
+    LoginError,
+    invoice_summary_url,
+    statement_url,
+    _is_dashboard,
+    _is_landing_page,
+    _is_login_page,
+)
+from readiness import (
+    timed,
+    LOGIN_STATE_JS,
+    GRID_CHANGED_JS,
+    GRID_SIGNATURE_JS,
+    PROPERTIES_TABLE_SELECTOR,
+)
+
+
+# --- Readiness waits (async counterparts of readiness.py) ---
+
+async def wait_for_login_state(page: Page, signals: list[str], timeout: float) -> str | None:
+    """Wait until one of the login-flow signals is present. Returns it, or None on timeout."""
+    with timed("login_state") as t:
+        try:
+            handle = await page.wait_for_function(LOGIN_STATE_JS, arg=signals, timeout=timeout)
+            return await handle.json_value()
+        except Exception:
+            t["ok"] = False
+            return None
+
+
+async def wait_for_url_change(page: Page, old_url: str, timeout: float) -> bool:
+    """Wait until the page URL differs from old_url. Returns False on timeout."""
+    with timed("url_change") as t:
+        try:
+            await page.wait_for_url(lambda url: url != old_url, timeout=timeout)
+            return True
+        except Exception:
+            t["ok"] = False
+            return False
+
+
+async def wait_for_properties_table(page: Page) -> bool:
+    """Wait for the invoice summary's properties table. Returns False on timeout."""
+    with timed("properties_table") as t:
+        try:
+            await page.locator(PROPERTIES_TABLE_SELECTOR).first.wait_for(
+                state="attached", timeout=config.LOAD_TIMEOUT
+            )
+            return True
+        except Exception:
+            t["ok"] = False
+            return False
+
+
+async def grid_signature(page: Page) -> str:
+    return await page.evaluate(GRID_SIGNATURE_JS)
+
+
+async def wait_for_grid_rows(page: Page, previous: str = "") -> bool:
+    """Wait for the Invoices/Checks grid to render rows different from `previous`."""
+    with timed("grid_rows") as t:
+        try:
+            await page.wait_for_function(GRID_CHANGED_JS, arg=previous, timeout=config.GRID_TIMEOUT)
+            return True
+        except Exception:
+            t["ok"] = False
+            return False
+
+
+async def launch_browser() -> tuple:
+    """Launch Playwright with persistent context (always headed). Returns (playwright, context, page)."""
+    config.BROWSER_STATE_PATH.mkdir(parents=True, exist_ok=True)
+
+    pw = await async_playwright().start()
+    context = await pw.chromium.launch_persistent_context(
+        user_data_dir=str(config.BROWSER_STATE_PATH),
+        headless=False,
+        viewport={"width": 1280, "height": 900},
+        accept_downloads=False,
+    )
+    context.set_default_timeout(config.NAV_TIMEOUT)
+    page = context.pages[0] if context.pages else await context.new_page()
+    return pw, context, page
+
+
+async def close_browser(pw, context: BrowserContext) -> None:
+    """Gracefully close browser and Playwright."""
+    try:
+        await context.close()
+    except Exception:
+        pass
+    try:
+        await pw.stop()
+    except Exception:
+        pass
+
+
+async def _is_mfa_page(page: Page) -> bool:
+    """Check if MFA challenge is present."""
+    url = page.url.lower()
+    if "mfa-sms-challenge" in url:
+        return True
+    try:
+        await page.wait_for_selector("text=Verify Your Identity", timeout=2000)
+        return True
+    except Exception:
+        pass
+    try:
+        await page.wait_for_selector("text=Enter the code", timeout=1000)
+        return True
+    except Exception:
+        pass
+    return False
+
+
+async def login(page: Page) -> None:
+    """Navigate to EnergyLink and log in. Raises MFARequiredError if MFA appears."""
+    await page.goto(config.LOGIN_URL, wait_until="domcontentloaded", timeout=config.NAV_TIMEOUT)
+    await wait_for_login_state(page, ["dashboard", "sign_in_link", "login_form", "mfa"],
+                               timeout=config.LOAD_TIMEOUT)
+
+    # Already logged in?
+    if _is_dashboard(page):
+        return
+
+    # Landing page: need to click the "SIGN IN" link first
+    if _is_landing_page(page) and not _is_login_page(page):
+        landing_url = page.url
+        await page.locator('a:has-text("SIGN IN")').first.click()
+        await wait_for_url_change(page, landing_url, timeout=config.NAV_TIMEOUT)
+        await wait_for_login_state(page, ["dashboard", "login_form", "mfa"],
+                                   timeout=config.LOAD_TIMEOUT)
+
+    # Wait for things to settle — follow any auto-redirects
+    for _ in range(10):
+        if _is_dashboard(page):
+            return
+        if await _is_mfa_page(page):
+            await _handle_mfa_wait(page)
+            return
+        if _is_login_page(page):
+            has_email = await page.locator('input[name="email"], input[type="email"], input[name="username"]').count() > 0
+            has_password = await page.locator('input[name="password"], input[type="password"]').count() > 0
+            if has_email or has_password:
+                await _do_login(page)
+                return
+        await wait_for_login_state(page, ["dashboard", "login_form", "mfa"], timeout=2000)
+
+    raise LoginError(f"Login did not reach a known state. Current URL: {page.url}")
+
+
+async def _handle_mfa_wait(page: Page) -> None:
+    """Handle MFA challenge. Wait for user to complete it in the browser window."""
+    print("MFA detected — please complete MFA in the browser window...")
+    print(f"Waiting up to {config.MFA_TIMEOUT // 1000 // 60} minutes for you to enter the code...")
+    try:
+        await page.wait_for_url("**/Core/BSP/Dashboard**", timeout=config.MFA_TIMEOUT)
+        print("MFA completed successfully! Device should now be trusted.")
+    except Exception:
+        if not _is_dashboard(page):
+            raise MFARequiredError("MFA was not completed within 5 minutes")
+
+
+async def _do_login(page: Page) -> None:
+    """Fill login form and submit."""
+    email_input = page.locator('input[name="email"], input[type="email"], input[name="username"]').first
+    await email_input.wait_for(state="visible", timeout=config.LOAD_TIMEOUT)
+    await email_input.fill(config.USERNAME)
+
+    # Some login flows have a "Continue" button before password
+    await page.locator('button:has-text("Continue"), button[type="submit"]').first.click()
+    await wait_for_login_state(page, ["dashboard", "mfa", "password"], timeout=config.LOAD_TIMEOUT)
+
+    if _is_dashboard(page):
+        return
+    if await _is_mfa_page(page):
+        await _handle_mfa_wait(page)
+        return
+
+    password_input = page.locator('input[name="password"], input[type="password"]').first
+    await password_input.wait_for(state="visible", timeout=config.LOAD_TIMEOUT)
+    await password_input.fill(config.PASSWORD)
+
+    sign_in_btn = page.locator('button:has-text("Sign In"), button:has-text("Log In"), button[type="submit"]').first
+    password_url = page.url
+    await sign_in_btn.click()
+    await wait_for_url_change(page, password_url, timeout=config.NAV_TIMEOUT)
+    await wait_for_login_state(page, ["dashboard", "mfa"], timeout=config.LOAD_TIMEOUT)
+
+    if _is_dashboard(page):
+        return
+    if await _is_mfa_page(page):
+        await _handle_mfa_wait(page)
+        return
+
+    try:
+        await page.wait_for_url("**/Core/BSP/Dashboard**", timeout=config.NAV_TIMEOUT)
+    except Exception:
+        if await _is_mfa_page(page):
+            await _handle_mfa_wait(page)
+            return
+        raise LoginError(f"Login did not reach dashboard. Current URL: {page.url}")
+
+
+async def navigate_to_invoices(page: Page) -> None:
+    """Navigate to the Invoices / Checks tab."""
+    await page.goto(config.DASHBOARD_URL, wait_until="domcontentloaded", timeout=config.NAV_TIMEOUT)
+    tab = page.get_by_role("tab", name="Invoices / Checks")
+    await tab.wait_for(state="visible", timeout=config.LOAD_TIMEOUT)
+    await tab.click()
+    await wait_for_grid_rows(page)
+
+
+# Pacing is done by the orchestrator's AsyncRateLimiter across all worker
+# pages; parse_statement_details waits for the detail table itself.
+
+async def navigate_to_invoice_summary(page: Page, invoice_id: int) -> None:
+    """Navigate to an invoice summary page."""
+    await page.goto(invoice_summary_url(invoice_id), wait_until="domcontentloaded",
+                    timeout=config.NAV_TIMEOUT)
+    await wait_for_properties_table(page)
+
+
+async def navigate_to_statement(page: Page, statement_id: int) -> None:
+    """Navigate to a statement summary page."""
+    await page.goto(statement_url(statement_id), wait_until="domcontentloaded",
+                    timeout=config.NAV_TIMEOUT)
+
+
+async def fetch_html(context: BrowserContext, url: str) -> str:
+    """GET a page's raw HTML through the context's request API (shares its cookies).
+
+    Raises LoginError if the session has expired and the request was redirected.
+    """
+    response = await context.request.get(url, timeout=config.NAV_TIMEOUT)
+    if urlsplit(response.url)[:3] != urlsplit(url)[:3]:
+        raise LoginError(f"HTTP session is no longer logged in (redirected to {response.url})")
+    if not response.ok:
+        raise RuntimeError(f"GET {url} returned HTTP {response.status}")
+    return await response.text()
@@ -0,0 +1,103 @@
+"""Asyncio page parsing for EnergyLink scraper.
+
+Mirrors parsers.py on top of playwright.async_api. The in-page extraction
+scripts and the row-processing logic are shared with the sync parsers; only
+the evaluate() calls differ.
+"""
+
+import re
+from playwright.async_api import Page
+
+import config
+from async_browser import grid_signature, wait_for_grid_rows
+from parsers import (
+    _invoices_from_grid_rows,
+    _invoice_summary_from_rows,
+    _details_from_rows,
+    _GRID_ROWS_JS,
+    _TABLE_ROWS_JS,
+    _DETAIL_TABLE_FALLBACK_JS,
+    _DETAIL_TABLE_SELECTOR,
+)
+from readiness import timed
+
+
+# --- Invoice List (AG Grid on Invoices/Checks tab) ---
+
+async def parse_invoice_list(page: Page) -> list[dict]:
+    """Parse all invoices from the AG Grid on the Invoices/Checks tab."""
+    return [inv async for invoices in iter_invoice_pages(page) for inv in invoices]
+
+
+async def iter_invoice_pages(page: Page):
+    """Walk the Invoices/Checks grid one page at a time, yielding each page's invoices."""
+    invoices_container = page.locator(
+        ".ag-center-cols-container:has(.ag-row .ag-cell[col-id='status'])"
+    ).first
+
+    if not await wait_for_grid_rows(page):
+        return
+
+    while True:
+        yield _invoices_from_grid_rows(await invoices_container.evaluate(_GRID_ROWS_JS))
+
+        if not await _go_to_next_grid_page(page):
+            break
+
+
+async def _go_to_next_grid_page(page) -> bool:
+    """Click the next page button in AG Grid pagination. Returns False if on last page."""
+    try:
+        pagination = page.locator(".pagination-container:visible")
+        if await pagination.count() == 0:
+            return False
+
+        page_input = pagination.locator(".textbox-pagenumber").first
+        if await page_input.count() == 0:
+            return False
+
+        current_page = int(await page_input.input_value())
+
+        pagination_text = await pagination.first.inner_text()
+        match = re.search(r"of\s+(\d+)\s*$", pagination_text)
+        if not match:
+            return False
+        total_pages = int(match.group(1))
+
+        if current_page >= total_pages:
+            return False
+
+        previous_rows = await grid_signature(page)
+        await page_input.click()
+        await page_input.fill(str(current_page + 1))
+        await page_input.press("Enter")
+
+        return await wait_for_grid_rows(page, previous_rows)
+
+    except Exception:
+        return False
+
+
+# --- Invoice Summary Page ---
+
+async def parse_invoice_summary(page: Page, invoice_id: int) -> dict:
+    """Parse the Invoice Summary page. Same result shape as parsers.parse_invoice_summary."""
+    return _invoice_summary_from_rows(await page.evaluate(_TABLE_ROWS_JS), invoice_id)
+
+
+# --- Statement Summary Page ---
+
+async def parse_statement_details(page: Page, statement_id: int) -> list[dict]:
+    """Parse line items from a Statement Summary page. See parsers.parse_statement_details."""
+    detail_table = page.locator(_DETAIL_TABLE_SELECTOR).last
+
+    try:
+        with timed("statement_table"):
+            await detail_table.wait_for(state="visible", timeout=config.LOAD_TIMEOUT)
+        rows = await detail_table.evaluate(_TABLE_ROWS_JS)
+    except Exception:
+        rows = await page.evaluate(_DETAIL_TABLE_FALLBACK_JS)
+        if rows is None:
+            return []
+
+    return _details_from_rows(rows, statement_id)
@@ -0,0 +1,140 @@
+"""EnergyLink Scraper - asyncio orchestrator.
+
+Runs the same scrape as scraper.py on the async Playwright engine: every
+invoice and statement is a task, and up to config.WORKERS pages load at once
+inside a single event loop under the global rate limit.
+
+Invoked via `python scraper.py --async`; run bookkeeping and error handling
+stay in scraper.main.
+"""
+
+import asyncio
+
+import config
+import pipeline
+from async_browser import (
+    launch_browser,
+    close_browser,
+    login,
+    navigate_to_invoices,
+    navigate_to_invoice_summary,
+    navigate_to_statement,
+    fetch_html,
+)
+from async_parsers import iter_invoice_pages, parse_invoice_summary, parse_statement_details
+from browser import LoginError, invoice_summary_url, statement_url
+from parsers import parse_invoice_summary_html, parse_statement_details_html
+from readiness import TIMINGS
+from run_log import RunLogger
+from workers import AsyncRateLimiter
+
+
+async def run(conn, run_id: int, stats: dict, logger: RunLogger) -> None:
+    """Scrape with the async Playwright engine, updating stats in place."""
+    pw = None
+    context = None
+
+    try:
+        # Launch browser and login
+        logger.log("INFO", "Launching browser (async engine)...")
+        pw, context, page = await launch_browser()
+
+        logger.log("INFO", "Attempting login...")
+        await login(page)
+        logger.log("INFO", "Login successful")
+
+        # Navigate to invoices list
+        logger.log("INFO", "Navigating to invoices list...")
+        await navigate_to_invoices(page)
+
+        # Worker pages are handed out through a queue, so at most WORKERS
+        # page loads are in flight no matter how many tasks are waiting.
+        # In HTTP fetch mode a semaphore bounds the in-flight requests instead.
+        pages = asyncio.Queue()
+        slots = asyncio.Semaphore(config.WORKERS)
+        limiter = AsyncRateLimiter(config.RATE_LIMIT)
+        if config.FETCH_MODE == "http":
+            logger.log("INFO", f"Fetching raw HTML with {config.WORKERS} request slot(s)")
+        else:
+            for _ in range(config.WORKERS):
+                pages.put_nowait(await context.new_page())
+            logger.log("INFO", f"Fetching with {pages.qsize()} worker page(s)")
+
+        async def fetch(kind, item_id):
+            if config.FETCH_MODE == "http":
+                url = invoice_summary_url(item_id) if kind == "invoice" else statement_url(item_id)
+                async with slots:
+                    await limiter.wait()
+                    html = await fetch_html(context, url)
+                if config.ARCHIVE_PAGES:
+                    pipeline.archive_page(logger, run_id, kind, item_id, lambda: html)
+                if kind == "invoice":
+                    return parse_invoice_summary_html(html, item_id)
+                return parse_statement_details_html(html, item_id)
+
+            navigate, parse = {
+                "invoice": (navigate_to_invoice_summary, parse_invoice_summary),
+                "statement": (navigate_to_statement, parse_statement_details),
+            }[kind]
+            worker_page = await pages.get()
+            try:
+                await limiter.wait()
+                await navigate(worker_page, item_id)
+                try:
+                    return await parse(worker_page, item_id)
+                finally:
+                    if config.ARCHIVE_PAGES:
+                        await pipeline.archive_rendered_page(logger, run_id, kind, item_id,
+                                                             worker_page)
+            finally:
+                pages.put_nowait(worker_page)
+
+        async def do_statement(statement_id):
+            try:
+                details = await fetch("statement", statement_id)
+                pipeline.store_statement(conn, logger, statement_id, details)
+            except LoginError:
+                raise
+            except Exception as e:
+                pipeline.fail_item(conn, logger, "statement", statement_id, e)
+
+        async def do_invoice(inv):
+            invoice_id = inv["invoice_id"]
+            try:
+                logger.log("INFO", f"Processing invoice {invoice_id}...")
+                summary = await fetch("invoice", invoice_id)
+                statement_ids = pipeline.store_invoice(conn, run_id, logger, inv, summary)
+                stats["processed"] += 1
+            except LoginError:
+                raise
+            except Exception as e:
+                pipeline.fail_item(conn, logger, "invoice", invoice_id, e)
+                return
+            await asyncio.gather(*(do_statement(sid) for sid in statement_ids))
+
+        # Work left over from earlier runs starts first
+        tasks = []
+        for job in pipeline.resume_jobs(conn, run_id, logger):
+            if job["kind"] == "invoice":
+                tasks.append(asyncio.create_task(do_invoice(job["invoice"])))
+            else:
+                tasks.append(asyncio.create_task(do_statement(job["id"])))
+
+        # Walk the invoice grid on the login page; each page's new invoices
+        # start processing right away while the next grid page loads
+        logger.log("INFO", "Scanning invoice list...")
+        scan = pipeline.new_scan()
+        async for grid_invoices in iter_invoice_pages(page):
+            unprocessed = pipeline.scan_grid_page(conn, run_id, logger, scan,
+                                                  grid_invoices, stats)
+            tasks.extend(asyncio.create_task(do_invoice(inv)) for inv in unprocessed)
+            if scan["stop"]:
+                break
+        pipeline.log_scan(logger, scan, stats)
+
+        await asyncio.gather(*tasks)
+        logger.log("INFO", f"Page readiness waits: {TIMINGS.summary()}")
+
+    finally:
+        if pw and context:
+            await close_browser(pw, context)
@@ -0,0 +1,192 @@
+"""Offline benchmark for parsers.py.
+
+Runs each parser against the anonymized fixture pages in fixtures/ and
+reports rows parsed per second and browser round trips per page, with no
+portal login:
+
+    invoice_list.html             AG Grid Invoices/Checks tab (3 pages)
+    invoice_summary.html          InvoiceSummary.aspx with 14 properties
+    statement_tgnr.html           StatementSummary.aspx, TGNR categories
+    statement_sheridan_exco.html  StatementSummary.aspx, Sheridan/EXCO categories
+
+Two engines:
+  html     the *_html parsers on raw HTML via html_tables (no browser)
+  browser  the Playwright parsers on the fixture loaded into a local
+           headless Chromium; skipped if Chromium is not installed
+
+A round trip is one Playwright call that has to reach the browser (evaluate,
+wait_for, count, ...); building locators is local and not counted.
+
+Usage:
+    python benchmarks/bench_parsers.py
+    python benchmarks/bench_parsers.py --engine html --iterations 500
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import html_tables
+import parsers
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+STATEMENT_FIXTURES = ["statement_tgnr.html", "statement_sheridan_exco.html"]
+
+
+# --- html engine ---
+
+def _grid_rows_from_html(html: str) -> list[dict]:
+    """Offline stand-in for _GRID_ROWS_JS: every .ag-row in the Invoices grid, all pages."""
+    rows = []
+    for div in html_tables.parse_html(html).iter("div"):
+        if "ag-row" not in div.attrs.get("class", "").split():
+            continue
+        cols = {}
+        for cell in div.iter("div"):
+            col_id = cell.attrs.get("col-id")
+            if col_id and col_id not in cols:
+                cols[col_id] = html_tables.inner_text(cell)
+        if "status" in cols:
+            rows.append({"row_id": div.attrs.get("row-id"), "cols": cols})
+    return rows
+
+
+def _html_cases() -> list[tuple]:
+    """(parser name, fixture, callable returning the parsed rows)."""
+    cases = [("invoice_list (grid rows)", "invoice_list.html",
+              lambda html: parsers._invoices_from_grid_rows(_grid_rows_from_html(html))),
+             ("parse_invoice_summary_html", "invoice_summary.html",
+              lambda html: parsers.parse_invoice_summary_html(html, 1)["properties"])]
+    for name in STATEMENT_FIXTURES:
+        cases.append(("parse_statement_details_html", name,
+                      lambda html: parsers.parse_statement_details_html(html, 1)))
+    return cases
+
+
+def bench_html(iterations: int) -> list[dict]:
+    results = []
+    for parser_name, fixture, parse in _html_cases():
+        html = (FIXTURES / fixture).read_text(encoding="utf-8")
+        times = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            rows = parse(html)
+            times.append(time.perf_counter() - start)
+        results.append(_result("html", parser_name, fixture, len(rows), times, 0))
+    return results
+
+
+# --- browser engine ---
+
+class _CountingProxy:
+    """Wraps a Page or Locator and counts the calls that reach the browser."""
+
+    # Locator factories are resolved lazily and never leave the process
+    _LOCAL = {"locator", "nth", "filter", "and_", "or_", "frame_locator",
+              "get_by_role", "get_by_text", "get_by_label", "get_by_test_id"}
+
+    def __init__(self, target, counter: dict):
+        self._target = target
+        self._counter = counter
+
+    def _wrap(self, value):
+        from playwright.sync_api import Locator
+        return _CountingProxy(value, self._counter) if isinstance(value, Locator) else value
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if not callable(value):
+            return self._wrap(value)
+
+        def call(*args, **kwargs):
+            if name not in self._LOCAL:
+                self._counter["round_trips"] += 1
+            return self._wrap(value(*args, **kwargs))
+        return call
+
+
+def bench_browser(iterations: int) -> list[dict] | None:
+    """Returns None if Playwright/Chromium is unavailable."""
+    try:
+        from playwright.sync_api import sync_playwright
+        pw = sync_playwright().start()
+        browser = pw.chromium.launch(headless=True)
+    except Exception as e:
+        print(f"browser engine skipped: {e.__class__.__name__}: {str(e).splitlines()[0]}")
+        return None
+
+    cases = [("parse_invoice_list", "invoice_list.html", lambda p: parsers.parse_invoice_list(p)),
+             ("parse_invoice_summary", "invoice_summary.html",
+              lambda p: parsers.parse_invoice_summary(p, 1)["properties"])]
+    for name in STATEMENT_FIXTURES:
+        cases.append(("parse_statement_details", name,
+                      lambda p: parsers.parse_statement_details(p, 1)))
+
+    results = []
+    try:
+        page = browser.new_page()
+        for parser_name, fixture, parse in cases:
+            html = (FIXTURES / fixture).read_text(encoding="utf-8")
+            times = []
+            round_trips = 0
+            for _ in range(iterations):
+                page.set_content(html)
+                counter = {"round_trips": 0}
+                start = time.perf_counter()
+                rows = parse(_CountingProxy(page, counter))
+                times.append(time.perf_counter() - start)
+                round_trips = counter["round_trips"]
+            results.append(_result("browser", parser_name, fixture, len(rows), times, round_trips))
+    finally:
+        browser.close()
+        pw.stop()
+    return results
+
+
+# --- reporting ---
+
+def _result(engine, parser_name, fixture, rows, times, round_trips) -> dict:
+    median = statistics.median(times)
+    return {
+        "engine": engine,
+        "parser": parser_name,
+        "fixture": fixture,
+        "rows": rows,
+        "ms_per_page": median * 1000,
+        "rows_per_sec": rows / median if median else 0.0,
+        "round_trips": round_trips,
+    }
+
+
+def print_report(results: list[dict]) -> None:
+    header = (f"{'engine':<8} {'parser':<30} {'fixture':<30} {'rows':>5} "
+              f"{'ms/page':>9} {'rows/s':>11} {'trips/page':>10}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['engine']:<8} {r['parser']:<30} {r['fixture']:<30} {r['rows']:>5} "
+              f"{r['ms_per_page']:>9.2f} {r['rows_per_sec']:>11,.0f} {r['round_trips']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parsers.py on offline fixtures")
+    parser.add_argument("--engine", choices=["html", "browser", "all"], default="all")
+    parser.add_argument("--iterations", type=int, default=None,
+                        help="Runs per fixture (default 200 for html, 10 for browser)")
+    args = parser.parse_args()
+
+    results = []
+    if args.engine in ("html", "all"):
+        results += bench_html(args.iterations or 200)
+    if args.engine in ("browser", "all"):
+        results += bench_browser(args.iterations or 10) or []
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
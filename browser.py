@@ -1,9 +1,14 @@
 """Browser automation for EnergyLink scraper using Playwright."""
 
-import time
 from playwright.sync_api import sync_playwright, BrowserContext, Page
 
 import config
+from readiness import (
+    wait_for_login_state,
+    wait_for_url_change,
+    wait_for_properties_table,
+    wait_for_grid_rows,
+)
 
 
 class MFARequiredError(Exception):
@@ -83,7 +88,8 @@ def _is_mfa_page(page: Page) -> bool:
 def login(page: Page) -> None:
     """Navigate to EnergyLink and log in. Raises MFARequiredError if MFA appears."""
     page.goto(config.LOGIN_URL, wait_until="domcontentloaded", timeout=config.NAV_TIMEOUT)
-    time.sleep(2)
+    wait_for_login_state(page, ["dashboard", "sign_in_link", "login_form", "mfa"],
+                         timeout=config.LOAD_TIMEOUT)
 
     # Already logged in?
     if _is_dashboard(page):
@@ -92,9 +98,12 @@ def login(page: Page) -> None:
     # Landing page: need to click the "SIGN IN" link first
     if _is_landing_page(page) and not _is_login_page(page):
         sign_in_link = page.locator('a:has-text("SIGN IN")').first
+        landing_url = page.url
         sign_in_link.click()
         # This triggers a postback that redirects to Auth0 or straight to dashboard
-        time.sleep(5)
+        wait_for_url_change(page, landing_url, timeout=config.NAV_TIMEOUT)
+        wait_for_login_state(page, ["dashboard", "login_form", "mfa"],
+                             timeout=config.LOAD_TIMEOUT)
 
     # After clicking SIGN IN, we may end up at:
     # 1. Dashboard (auto-login via persistent session)
@@ -116,8 +125,8 @@ def login(page: Page) -> None:
             if has_email or has_password:
                 _do_login(page)
                 return
-        # Still redirecting, wait a bit
-        time.sleep(2)
+        # Still redirecting, wait (up to 2s) for the next recognizable state
+        wait_for_login_state(page, ["dashboard", "login_form", "mfa"], timeout=2000)
 
     raise LoginError(f"Login did not reach a known state. Current URL: {page.url}")
 
@@ -144,7 +153,7 @@ def _do_login(page: Page) -> None:
     # Some login flows have a "Continue" button before password
     continue_btn = page.locator('button:has-text("Continue"), button[type="submit"]').first
     continue_btn.click()
-    time.sleep(3)
+    wait_for_login_state(page, ["dashboard", "mfa", "password"], timeout=config.LOAD_TIMEOUT)
 
     # Check if we landed on dashboard, MFA, or password page
     if _is_dashboard(page):
@@ -160,10 +169,12 @@ def _do_login(page: Page) -> None:
 
     # Click sign in
     sign_in_btn = page.locator('button:has-text("Sign In"), button:has-text("Log In"), button[type="submit"]').first
+    password_url = page.url
     sign_in_btn.click()
 
     # Wait for navigation result
-    time.sleep(5)
+    wait_for_url_change(page, password_url, timeout=config.NAV_TIMEOUT)
+    wait_for_login_state(page, ["dashboard", "mfa"], timeout=config.LOAD_TIMEOUT)
 
     if _is_dashboard(page):
         return
@@ -184,22 +195,47 @@ def _do_login(page: Page) -> None:
 def navigate_to_invoices(page: Page) -> None:
     """Navigate to the Invoices / Checks tab."""
     page.goto(config.DASHBOARD_URL, wait_until="domcontentloaded", timeout=config.NAV_TIMEOUT)
-    time.sleep(2)
-    # Click the Invoices/Checks tab
+    # Click the Invoices/Checks tab once it has rendered
     tab = page.get_by_role("tab", name="Invoices / Checks")
+    tab.wait_for(state="visible", timeout=config.LOAD_TIMEOUT)
     tab.click()
-    time.sleep(3)  # Wait for AG Grid to load
+    wait_for_grid_rows(page)
+
+
+def invoice_summary_url(invoice_id: int) -> str:
+    return f"{config.ENERGYLINK_URL}/Invoice/InvoiceSummary.aspx?InvoiceId={invoice_id}&Context=Inbound"
+
+
+def statement_url(statement_id: int) -> str:
+    return f"{config.ENERGYLINK_URL}/Statement/StatementSummary.aspx?StatementId={statement_id}&Context=Inbound"
 
 
 def navigate_to_invoice_summary(page: Page, invoice_id: int) -> None:
     """Navigate to an invoice summary page."""
-    url = f"{config.ENERGYLINK_URL}/Invoice/InvoiceSummary.aspx?InvoiceId={invoice_id}&Context=Inbound"
-    page.goto(url, wait_until="domcontentloaded", timeout=config.NAV_TIMEOUT)
-    time.sleep(config.PAGE_DELAY)
+    page.goto(invoice_summary_url(invoice_id), wait_until="domcontentloaded", timeout=config.NAV_TIMEOUT)
+    wait_for_properties_table(page)
 
 
 def navigate_to_statement(page: Page, statement_id: int) -> None:
     """Navigate to a statement summary page."""
-    url = f"{config.ENERGYLINK_URL}/Statement/StatementSummary.aspx?StatementId={statement_id}&Context=Inbound"
-    page.goto(url, wait_until="domcontentloaded", timeout=config.NAV_TIMEOUT)
-    time.sleep(config.PAGE_DELAY)
+    page.goto(statement_url(statement_id), wait_until="domcontentloaded", timeout=config.NAV_TIMEOUT)
+    # parse_statement_details waits for the detail table itself
+
+
+def start_navigation(page: Page, url: str) -> None:
+    """Begin loading a URL, returning as soon as the server responds.
+
+    The browser keeps loading the page in the background, so several pages
+    can be in flight at once. Pair with finish_navigation().
+    """
+    page.goto(url, wait_until="commit", timeout=config.NAV_TIMEOUT)
+
+
+def finish_navigation(page: Page, ready=None) -> None:
+    """Wait for a navigation started with start_navigation() to load.
+
+    ready(page), if given, is a readiness wait for page-specific content.
+    """
+    page.wait_for_load_state("domcontentloaded", timeout=config.NAV_TIMEOUT)
+    if ready:
+        ready(page)
@@ -25,6 +25,10 @@ DB_PATH = DATA_DIR / "energylink.db"
 # Browser state (persistent context for cookies/MFA trust)
 BROWSER_STATE_PATH = DATA_DIR / "browser_state"
 
+# Raw page archive (compressed HTML of every fetched summary page)
+ARCHIVE_DIR = DATA_DIR / "archive"
+ARCHIVE_PAGES = True    # override via --no-archive
+
 # Flags - override via command-line args
 DEBUG = False       # True = process only first unprocessed invoice
 
@@ -36,5 +40,23 @@ NAV_TIMEOUT = 30_000        # page navigation timeout
 LOAD_TIMEOUT = 15_000       # element load/wait timeout
 GRID_TIMEOUT = 20_000       # AG Grid render timeout
 
-# Rate limiting (seconds)
-PAGE_DELAY = 1.5            # delay between page loads
+# Rate limiting (page loads per second)
+RATE_LIMIT = 2.0            # max page loads per second across all workers
+
+# Run log buffering (records are written to scrape_logs in batches)
+LOG_FLUSH_SIZE = 200        # flush once this many records are buffered
+LOG_FLUSH_INTERVAL = 2.0    # ...or after this many seconds
+
+# Incremental grid scan - the Invoices/Checks grid lists the newest invoices
+# first, so paging stops after this many consecutive pages with no new
+# invoices. Override with --full-scan.
+KNOWN_PAGES_BEFORE_STOP = 2
+FULL_SCAN = False
+
+# Work queue - failed invoices/statements are retried by later runs until
+# they have been attempted this many times
+MAX_ATTEMPTS = 5
+
+# Concurrency - override via --workers / --fetch
+WORKERS = 1                 # number of pages (or HTTP requests) fetching at once
+FETCH_MODE = "browser"      # "browser" renders each page; "http" GETs raw HTML with the session cookies
@@ -1,16 +1,39 @@
 """SQLite database schema and helper functions for EnergyLink scraper."""
 
+import json
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 
 import config
 
 
-def _now() -> str:
+def now() -> str:
+    """The current UTC time as an ISO 8601 timestamp."""
     return datetime.now(timezone.utc).isoformat()
 
 
+_MONTHS = {
+    "Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+    "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12,
+}
+
+
+def production_month(production_date: str | None) -> str | None:
+    """Normalize a statement production date like 'Nov 25' to '2025-11'.
+
+    Returns None for anything that isn't a 'Mon YY' (or 'Mon YYYY') date.
+    """
+    parts = (production_date or "").split()
+    if len(parts) != 2 or parts[0][:3].title() not in _MONTHS or not parts[1].isdigit():
+        return None
+    year = int(parts[1])
+    if year < 100:
+        year += 2000
+    return f"{year:04d}-{_MONTHS[parts[0][:3].title()]:02d}"
+
+
 def get_connection() -> sqlite3.Connection:
     config.DATA_DIR.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(str(config.DB_PATH))
@@ -20,7 +43,26 @@ def get_connection() -> sqlite3.Connection:
     return conn
 
 
+@contextmanager
+def unit_of_work(conn: sqlite3.Connection):
+    """Run the enclosed writes as one transaction.
+
+    The invoice, property and statement detail helpers below do not commit;
+    wrap them in this so an invoice and everything under it is committed
+    together (one fsync) or rolled back together.
+    """
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
 def init_db(conn: sqlite3.Connection) -> None:
+    existing = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
     conn.executescript("""
         CREATE TABLE IF NOT EXISTS scrape_runs (
             id              INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -88,18 +130,90 @@ def init_db(conn: sqlite3.Connection) -> None:
             owner_pct         REAL,
             distribution_pct  REAL,
             owner_volume      REAL,
-            owner_value       REAL
+            owner_value       REAL,
+            production_month  TEXT    -- 'YYYY-MM', derived from production_date
+        );
+
+        -- Persistent work queue: one row per invoice summary and per
+        -- statement to fetch. status is pending, in_progress (claimed by a
+        -- live run), done or failed. Invoice rows keep the grid row as JSON
+        -- in payload so they can be resumed without re-walking the grid.
+        CREATE TABLE IF NOT EXISTS work_items (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind        TEXT NOT NULL,
+            item_id     INTEGER NOT NULL,
+            invoice_id  INTEGER NOT NULL,
+            status      TEXT NOT NULL DEFAULT 'pending',
+            attempts    INTEGER NOT NULL DEFAULT 0,
+            payload     TEXT,
+            last_error  TEXT,
+            run_id      INTEGER REFERENCES scrape_runs(id),
+            updated_at  TEXT NOT NULL,
+            UNIQUE (kind, item_id)
         );
+        CREATE INDEX IF NOT EXISTS idx_work_items_status ON work_items(status);
+
+        CREATE INDEX IF NOT EXISTS idx_statement_details_statement
+            ON statement_details(statement_id);
+
+        -- Distinct filter values for the viewer, added to at insert time;
+        -- the primary key keeps each one sorted
+        CREATE TABLE IF NOT EXISTS dim_operators (
+            name TEXT PRIMARY KEY
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS dim_properties (
+            name TEXT PRIMARY KEY
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS dim_categories (
+            name TEXT PRIMARY KEY
+        ) WITHOUT ROWID;
+
+        -- production_month ('YYYY-MM') orders the months; production_date is
+        -- the portal's 'Mon YY' label
+        CREATE TABLE IF NOT EXISTS dim_months (
+            production_month TEXT PRIMARY KEY,
+            production_date  TEXT NOT NULL
+        ) WITHOUT ROWID;
     """)
+    # detail_cube superseded the coarser monthly_rollup table
+    conn.execute("DROP TABLE IF EXISTS monthly_rollup")
+    # A cube without the production_date key index predates it; rebuild it
+    has_key = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_detail_cube_key'"
+    ).fetchone()
+    if "detail_cube" in existing and not has_key:
+        conn.execute("DROP TABLE detail_cube")
+        existing.discard("detail_cube")
+    conn.execute(_CREATE_CUBE_SQL)
+    conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_detail_cube_key ON detail_cube({_CUBE_KEY})")
+    _migrate_production_month(conn)
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_statement_details_month
+                    ON statement_details(production_month, statement_id)""")
+    if "detail_cube" not in existing:
+        rebuild_detail_cube(conn)
+    if "dim_months" not in existing:
+        rebuild_dimensions(conn)
     conn.commit()
 
 
+def _migrate_production_month(conn: sqlite3.Connection) -> None:
+    """Add and backfill statement_details.production_month on older databases."""
+    columns = {r[1] for r in conn.execute("PRAGMA table_info(statement_details)")}
+    if "production_month" in columns:
+        return
+    conn.execute("ALTER TABLE statement_details ADD COLUMN production_month TEXT")
+    conn.create_function("production_month", 1, production_month, deterministic=True)
+    conn.execute("UPDATE statement_details SET production_month = production_month(production_date)")
+
+
 # --- Scrape run helpers ---
 
 def create_run(conn: sqlite3.Connection) -> int:
     cur = conn.execute(
         "INSERT INTO scrape_runs (started_at, status) VALUES (?, 'running')",
-        (_now(),),
+        (now(),),
     )
     conn.commit()
     return cur.lastrowid
@@ -113,26 +227,46 @@ def finish_run(conn: sqlite3.Connection, run_id: int, status: str,
            SET finished_at = ?, status = ?, invoices_processed = ?,
                invoices_skipped = ?, error_message = ?
            WHERE id = ?""",
-        (_now(), status, invoices_processed, invoices_skipped, error_message, run_id),
+        (now(), status, invoices_processed, invoices_skipped, error_message, run_id),
     )
     conn.commit()
 
 
-def log(conn: sqlite3.Connection, run_id: int, level: str, message: str) -> None:
-    conn.execute(
+def insert_logs(conn: sqlite3.Connection, records: list[tuple]) -> None:
+    """Write (run_id, timestamp, level, message) records in one transaction."""
+    conn.executemany(
         "INSERT INTO scrape_logs (run_id, timestamp, level, message) VALUES (?, ?, ?, ?)",
-        (run_id, _now(), level, message),
+        records,
     )
     conn.commit()
 
 
 # --- Invoice helpers ---
 
-def invoice_exists(conn: sqlite3.Connection, invoice_id: int) -> bool:
-    row = conn.execute(
-        "SELECT 1 FROM invoices WHERE invoice_id = ?", (invoice_id,)
-    ).fetchone()
-    return row is not None
+def existing_invoice_ids(conn: sqlite3.Connection, invoice_ids: list[int]) -> dict[int, bool]:
+    """Which of the given invoice IDs are already stored or queued (one query).
+
+    Maps each to True if it is done (stored, or its work item is done), or
+    False if it is only queued: pending, in progress or failed.
+    """
+    if not invoice_ids:
+        return {}
+    placeholders = ", ".join("?" * len(invoice_ids))
+    rows = conn.execute(
+        f"""SELECT invoice_id, 1 FROM invoices WHERE invoice_id IN ({placeholders})
+            UNION ALL
+            SELECT item_id, status = 'done' FROM work_items
+            WHERE kind = 'invoice' AND item_id IN ({placeholders})""",
+        [*invoice_ids, *invoice_ids],
+    )
+    known = {}
+    for invoice_id, done in rows:
+        known[invoice_id] = known.get(invoice_id, False) or bool(done)
+    return known
+
+
+def get_invoice_ids(conn: sqlite3.Connection) -> set[int]:
+    return {r[0] for r in conn.execute("SELECT invoice_id FROM invoices")}
 
 
 def insert_invoice(conn: sqlite3.Connection, run_id: int, data: dict) -> None:
@@ -157,62 +291,318 @@ def insert_invoice(conn: sqlite3.Connection, run_id: int, data: dict) -> None:
             data.get("total_tax"),
             data.get("total_deductions"),
             data.get("total_amount"),
-            _now(),
+            now(),
             run_id,
         ),
     )
-    conn.commit()
+    _add_dimension(conn, "dim_operators", [data.get("operator")])
 
 
 # --- Property helpers ---
 
+def _property_params(invoice_id: int, data: dict) -> tuple:
+    return (
+        invoice_id,
+        data["statement_id"],
+        data.get("cost_center"),
+        data.get("description"),
+        data.get("state"),
+        data.get("county"),
+        data.get("owner_share_revenue"),
+        data.get("tax"),
+        data.get("deductions"),
+        data.get("total"),
+        now(),
+    )
+
+
+_INSERT_PROPERTY_SQL = """INSERT OR IGNORE INTO properties
+           (invoice_id, statement_id, cost_center, description, state, county,
+            owner_share_revenue, tax, deductions, total, scraped_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+
 def insert_property(conn: sqlite3.Connection, invoice_id: int, data: dict) -> None:
+    conn.execute(_INSERT_PROPERTY_SQL, _property_params(invoice_id, data))
+    _add_dimension(conn, "dim_properties", [data.get("description")])
+
+
+def insert_properties(conn: sqlite3.Connection, invoice_id: int, rows: list[dict]) -> None:
+    conn.executemany(_INSERT_PROPERTY_SQL, [_property_params(invoice_id, row) for row in rows])
+    _add_dimension(conn, "dim_properties", [row.get("description") for row in rows])
+
+
+def upsert_property(conn: sqlite3.Connection, invoice_id: int, data: dict) -> None:
+    """Insert a property, or overwrite the stored one (used by --reparse)."""
     conn.execute(
-        """INSERT OR IGNORE INTO properties
+        """INSERT INTO properties
            (invoice_id, statement_id, cost_center, description, state, county,
             owner_share_revenue, tax, deductions, total, scraped_at)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (
-            invoice_id,
-            data["statement_id"],
-            data.get("cost_center"),
-            data.get("description"),
-            data.get("state"),
-            data.get("county"),
-            data.get("owner_share_revenue"),
-            data.get("tax"),
-            data.get("deductions"),
-            data.get("total"),
-            _now(),
-        ),
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT(statement_id) DO UPDATE SET
+            invoice_id = excluded.invoice_id,
+            cost_center = excluded.cost_center,
+            description = excluded.description,
+            state = excluded.state,
+            county = excluded.county,
+            owner_share_revenue = excluded.owner_share_revenue,
+            tax = excluded.tax,
+            deductions = excluded.deductions,
+            total = excluded.total""",
+        _property_params(invoice_id, data),
     )
-    conn.commit()
+    _add_dimension(conn, "dim_properties", [data.get("description")])
+
+
+def property_exists(conn: sqlite3.Connection, statement_id: int) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM properties WHERE statement_id = ?", (statement_id,)
+    ).fetchone()
+    return row is not None
 
 
 # --- Statement detail helpers ---
 
-def insert_statement_detail(conn: sqlite3.Connection, statement_id: int, data: dict) -> None:
-    conn.execute(
+def delete_statement_details(conn: sqlite3.Connection, statement_id: int) -> None:
+    _apply_to_cube(conn, -1, "sd.statement_id = :statement_id", {"statement_id": statement_id})
+    conn.execute("DELETE FROM statement_details WHERE statement_id = ?", (statement_id,))
+
+
+_DETAIL_COLUMNS = (
+    "product_category", "code", "type_description", "production_date", "btu",
+    "property_volume", "property_price", "property_value", "owner_pct",
+    "distribution_pct", "owner_volume", "owner_value",
+)
+
+
+def _detail_params(statement_id: int, row: dict) -> tuple:
+    return (statement_id, *(row.get(c) for c in _DETAIL_COLUMNS),
+            production_month(row.get("production_date")))
+
+
+def insert_statement_details(conn: sqlite3.Connection, statement_id: int, rows: list[dict]) -> None:
+    """Insert a statement's line items and add them to detail_cube.
+
+    The statement's property and invoice must already be stored.
+    """
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM statement_details").fetchone()[0]
+    conn.executemany(
         """INSERT INTO statement_details
            (statement_id, product_category, code, type_description,
             production_date, btu, property_volume, property_price,
             property_value, owner_pct, distribution_pct,
-            owner_volume, owner_value)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (
-            statement_id,
-            data.get("product_category"),
-            data.get("code"),
-            data.get("type_description"),
-            data.get("production_date"),
-            data.get("btu"),
-            data.get("property_volume"),
-            data.get("property_price"),
-            data.get("property_value"),
-            data.get("owner_pct"),
-            data.get("distribution_pct"),
-            data.get("owner_volume"),
-            data.get("owner_value"),
-        ),
+            owner_volume, owner_value, production_month)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        [_detail_params(statement_id, row) for row in rows],
     )
-    conn.commit()
+    _apply_to_cube(conn, +1, "sd.statement_id = :statement_id AND sd.id > :last_id",
+                   {"statement_id": statement_id, "last_id": last_id})
+    _add_dimension(conn, "dim_categories", [row.get("product_category") for row in rows])
+    conn.executemany(
+        "INSERT OR IGNORE INTO dim_months (production_month, production_date) VALUES (?, ?)",
+        {(month, row["production_date"]) for row in rows
+         if (month := production_month(row.get("production_date")))},
+    )
+
+
+# --- Dimension helpers ---
+# Values are only ever added, so a value that stops being used (say, a
+# property renamed by --reparse) stays until rebuild_dimensions runs.
+
+def _add_dimension(conn: sqlite3.Connection, table: str, values: list) -> None:
+    conn.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)",
+                     [(v,) for v in set(values) if v is not None])
+
+
+def rebuild_dimensions(conn: sqlite3.Connection) -> None:
+    """Recompute the dim_* tables from the stored rows (does not commit)."""
+    for table, select in [
+        ("dim_operators", "SELECT DISTINCT operator FROM invoices WHERE operator IS NOT NULL"),
+        ("dim_properties",
+         "SELECT DISTINCT description FROM properties WHERE description IS NOT NULL"),
+        ("dim_categories", """SELECT DISTINCT product_category FROM statement_details
+                              WHERE product_category IS NOT NULL"""),
+        ("dim_months", """SELECT production_month, MIN(production_date) FROM statement_details
+                          WHERE production_month IS NOT NULL GROUP BY production_month"""),
+    ]:
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(f"INSERT INTO {table} {select}")
+
+
+# --- Detail cube ---
+# detail_cube holds statement_details pre-summed per production month,
+# operator, property, category and type_description, so the viewer can
+# answer any combination of its filters (and regroup types into expense
+# groups) from a few thousand rows instead of joining every line item. It is
+# kept current as details are inserted and deleted. production_date is part
+# of the key too, so dates production_month couldn't parse (stored with
+# production_month '') stay apart as they are in the line items. It keeps
+# NULL as NULL, which a primary key wouldn't match in ON CONFLICT, so the key
+# is a unique index reading NULL as char(0), a character no page text holds.
+
+_CUBE_KEY = ("production_month, IFNULL(production_date, char(0)), operator, property, "
+             "category, type_description")
+
+_CREATE_CUBE_SQL = """
+    CREATE TABLE IF NOT EXISTS detail_cube (
+        production_month  TEXT NOT NULL,
+        production_date   TEXT,
+        operator          TEXT NOT NULL,
+        property          TEXT NOT NULL,
+        category          TEXT NOT NULL,
+        type_description  TEXT NOT NULL,
+        row_count         INTEGER NOT NULL DEFAULT 0,
+        owner_value       REAL NOT NULL DEFAULT 0,
+        abs_owner_value   REAL NOT NULL DEFAULT 0,
+        owner_volume      REAL NOT NULL DEFAULT 0,
+        price_sum         REAL NOT NULL DEFAULT 0,
+        price_count       INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+_CUBE_MEASURES = ["row_count", "owner_value", "abs_owner_value", "owner_volume",
+                  "price_sum", "price_count"]
+
+# Missing keys other than production_date are stored as ''
+_CUBE_INSERT_SQL = f"""
+    INSERT INTO detail_cube
+        (production_month, production_date, operator, property, category,
+         type_description, {", ".join(_CUBE_MEASURES)})
+    SELECT
+        COALESCE(sd.production_month, ''),
+        sd.production_date,
+        COALESCE(i.operator, ''),
+        COALESCE(p.description, ''),
+        COALESCE(sd.product_category, ''),
+        COALESCE(sd.type_description, ''),
+        :sign * COUNT(*),
+        :sign * TOTAL(sd.owner_value),
+        :sign * TOTAL(ABS(sd.owner_value)),
+        :sign * TOTAL(sd.owner_volume),
+        :sign * TOTAL(sd.property_price),
+        :sign * COUNT(sd.property_price)
+    FROM statement_details sd
+    JOIN properties p ON sd.statement_id = p.statement_id
+    JOIN invoices i ON p.invoice_id = i.invoice_id
+"""
+_CUBE_GROUP_SQL = "GROUP BY 1, 2, 3, 4, 5, 6"
+
+
+def _apply_to_cube(conn: sqlite3.Connection, sign: int, where: str, params: dict) -> None:
+    """Add (sign=+1) or subtract (sign=-1) the sums of the details matching where."""
+    conn.execute(
+        f"""{_CUBE_INSERT_SQL}
+            WHERE {where}
+            {_CUBE_GROUP_SQL}
+            ON CONFLICT ({_CUBE_KEY}) DO UPDATE SET
+                {", ".join(f"{c} = {c} + excluded.{c}" for c in _CUBE_MEASURES)}""",
+        {**params, "sign": sign},
+    )
+    if sign < 0:
+        conn.execute("DELETE FROM detail_cube WHERE row_count <= 0")
+
+
+def rebuild_detail_cube(conn: sqlite3.Connection) -> None:
+    """Recompute detail_cube from scratch (does not commit)."""
+    conn.execute("DELETE FROM detail_cube")
+    conn.execute(f"{_CUBE_INSERT_SQL} WHERE 1 {_CUBE_GROUP_SQL}", {"sign": 1})
+
+
+# --- Work queue helpers ---
+# Items are created already claimed (in_progress) because a run only creates
+# them when it is about to fetch them. None of these commit; use unit_of_work.
+
+def claim_new_invoices(conn: sqlite3.Connection, run_id: int, invoices: list[dict]) -> None:
+    """Queue grid invoices as in_progress invoice items, keeping the grid row."""
+    timestamp = now()
+    conn.executemany(
+        """INSERT OR IGNORE INTO work_items
+           (kind, item_id, invoice_id, status, attempts, payload, run_id, updated_at)
+           VALUES ('invoice', ?, ?, 'in_progress', 1, ?, ?, ?)""",
+        [(inv["invoice_id"], inv["invoice_id"], json.dumps(inv), run_id, timestamp)
+         for inv in invoices],
+    )
+
+
+def claim_new_statements(conn: sqlite3.Connection, run_id: int, invoice_id: int,
+                         statement_ids: list[int]) -> list[int]:
+    """Queue an invoice's statements as in_progress items.
+
+    Returns the statement IDs that were newly queued; ones already known to
+    the work queue (e.g. when a failed invoice is retried) are left alone.
+    """
+    known = {r[0] for r in conn.execute(
+        "SELECT item_id FROM work_items WHERE kind = 'statement' AND invoice_id = ?",
+        (invoice_id,),
+    )}
+    new_ids = [sid for sid in statement_ids if sid not in known]
+    timestamp = now()
+    conn.executemany(
+        """INSERT OR IGNORE INTO work_items
+           (kind, item_id, invoice_id, status, attempts, run_id, updated_at)
+           VALUES ('statement', ?, ?, 'in_progress', 1, ?, ?)""",
+        [(sid, invoice_id, run_id, timestamp) for sid in new_ids],
+    )
+    return new_ids
+
+
+def complete_work(conn: sqlite3.Connection, kind: str, item_id: int) -> None:
+    conn.execute(
+        """UPDATE work_items SET status = 'done', last_error = NULL, updated_at = ?
+           WHERE kind = ? AND item_id = ?""",
+        (now(), kind, item_id),
+    )
+
+
+def fail_work(conn: sqlite3.Connection, kind: str, item_id: int, error: str) -> None:
+    conn.execute(
+        """UPDATE work_items SET status = 'failed', last_error = ?, updated_at = ?
+           WHERE kind = ? AND item_id = ?""",
+        (error, now(), kind, item_id),
+    )
+
+
+def reset_work(conn: sqlite3.Connection, max_attempts: int) -> dict:
+    """Make interrupted and retryable failed items pending again.
+
+    in_progress items were claimed by a run that died before finishing them.
+    Failed items are retried until they have been attempted max_attempts
+    times. Returns {"stale": n, "retried": n}.
+    """
+    timestamp = now()
+    stale = conn.execute(
+        "UPDATE work_items SET status = 'pending', updated_at = ? WHERE status = 'in_progress'",
+        (timestamp,),
+    ).rowcount
+    retried = conn.execute(
+        """UPDATE work_items SET status = 'pending', updated_at = ?
+           WHERE status = 'failed' AND attempts < ?""",
+        (timestamp, max_attempts),
+    ).rowcount
+    return {"stale": stale, "retried": retried}
+
+
+def claim_pending_work(conn: sqlite3.Connection, run_id: int) -> list[dict]:
+    """Claim every pending item for this run.
+
+    Returns dicts with kind, item_id, invoice_id and, for invoices, the
+    grid row under "invoice". Invoices come first.
+    """
+    rows = conn.execute(
+        """SELECT kind, item_id, invoice_id, payload FROM work_items
+           WHERE status = 'pending'
+           ORDER BY kind = 'statement', invoice_id, item_id"""
+    ).fetchall()
+    conn.execute(
+        """UPDATE work_items SET status = 'in_progress', attempts = attempts + 1,
+               run_id = ?, updated_at = ?
+           WHERE status = 'pending'""",
+        (run_id, now()),
+    )
+    items = []
+    for r in rows:
+        item = {"kind": r["kind"], "item_id": r["item_id"], "invoice_id": r["invoice_id"]}
+        if r["kind"] == "invoice":
+            item["invoice"] = json.loads(r["payload"])
+        items.append(item)
+    return items
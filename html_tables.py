@@ -0,0 +1,175 @@
+"""Offline table extraction from raw page HTML.
+
+Builds a minimal element tree with the stdlib HTMLParser and returns table
+rows in the same shape as the in-page scripts in parsers.py
+({"text", "cells", "href"}), so the same row-processing logic runs on HTML
+fetched over HTTP or read back from disk, with no browser involved.
+"""
+
+import re
+from html.parser import HTMLParser
+
+_VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+}
+_SKIP_TAGS = {"script", "style", "template", "noscript"}
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "caption", "dd", "div", "dl",
+    "dt", "fieldset", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5",
+    "h6", "header", "li", "main", "nav", "ol", "p", "pre", "section", "table",
+    "tbody", "tfoot", "thead", "tr", "ul",
+}
+_CELL_TAGS = {"td", "th"}
+
+
+class Element:
+    """An HTML element; children are Elements or text strings."""
+
+    __slots__ = ("tag", "attrs", "children", "parent")
+
+    def __init__(self, tag: str, attrs: dict, parent=None):
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+        self.parent = parent
+
+    def iter(self, tag: str):
+        """Yield descendant elements with the given tag, in document order."""
+        for child in self.children:
+            if isinstance(child, Element):
+                if child.tag == tag:
+                    yield child
+                yield from child.iter(tag)
+
+
+class _TreeBuilder(HTMLParser):
+    """Lenient tree builder: closes unterminated cells/rows like a browser would."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element("#document", {})
+        self.stack = [self.root]
+
+    def _close_until(self, tags: set, boundary: set) -> None:
+        """Pop open elements in `tags`, stopping at any element in `boundary`."""
+        for i in range(len(self.stack) - 1, 0, -1):
+            tag = self.stack[i].tag
+            if tag in boundary:
+                return
+            if tag in tags:
+                del self.stack[i:]
+                return
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _CELL_TAGS:
+            self._close_until(_CELL_TAGS, {"tr", "table"})
+        elif tag == "tr":
+            self._close_until({"tr"}, {"table"})
+
+        parent = self.stack[-1]
+        element = Element(tag, dict(attrs), parent)
+        parent.children.append(element)
+        if tag not in _VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        parent = self.stack[-1]
+        parent.children.append(Element(tag, dict(attrs), parent))
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+            # An end tag never closes past the table it appears in
+            if self.stack[i].tag == "table" and tag != "table":
+                return
+
+    def handle_data(self, data):
+        if self.stack[-1].tag in _SKIP_TAGS:
+            return
+        self.stack[-1].children.append(data)
+
+
+def parse_html(html: str) -> Element:
+    """Parse an HTML document into an Element tree."""
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def inner_text(element: Element) -> str:
+    """Approximate the browser's innerText: block elements and <br> break
+    lines, cells in a row are tab-separated, other whitespace collapses."""
+    parts = []
+
+    def walk(node):
+        for child in node.children:
+            if isinstance(child, str):
+                parts.append(child)
+                continue
+            if child.tag in _SKIP_TAGS:
+                continue
+            if child.tag == "br":
+                parts.append("\n")
+            elif child.tag in _CELL_TAGS:
+                parts.append("\t")
+                walk(child)
+            elif child.tag in _BLOCK_TAGS:
+                parts.append("\n")
+                walk(child)
+                parts.append("\n")
+            else:
+                walk(child)
+
+    walk(element)
+    lines = []
+    for line in "".join(parts).split("\n"):
+        cells = [re.sub(r"\s+", " ", cell.replace("\xa0", " ")).strip()
+                 for cell in line.split("\t")]
+        line = "\t".join(c for c in cells if c)
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def table_rows(node: Element) -> list[dict]:
+    """Rows under `node` in the shape of parsers._TABLE_ROWS_JS."""
+    rows = []
+    for tr in node.iter("tr"):
+        href = None
+        for a in tr.iter("a"):
+            if "StatementId" in a.attrs.get("href", ""):
+                href = a.attrs["href"]
+                break
+        rows.append({
+            "text": inner_text(tr),
+            "cells": [inner_text(td) for td in tr.iter("td")],
+            "href": href,
+        })
+    return rows
+
+
+def detail_table_rows(root: Element, category_names: list[str]) -> list[dict] | None:
+    """Rows of the statement detail table, mirroring parse_statement_details.
+
+    Picks the last table containing a cell whose text is exactly one of the
+    category names; otherwise the last table with more than 5 rows whose text
+    has "Code", "Type Desc" and "ROYALTY". Returns None if neither exists.
+    """
+    categories = set(category_names)
+    tables = list(root.iter("table"))
+
+    for table in reversed(tables):
+        if any(inner_text(td) in categories for td in table.iter("td")):
+            return table_rows(table)
+
+    for table in reversed(tables):
+        if sum(1 for _ in table.iter("tr")) > 5:
+            text = inner_text(table)
+            if "Code" in text and "Type Desc" in text and "ROYALTY" in text:
+                return table_rows(table)
+
+    return None
@@ -0,0 +1,53 @@
+"""Cookie-sharing HTTP client for fetching portal pages without rendering.
+
+After login, the browser context's session cookies are enough to GET
+InvoiceSummary.aspx and StatementSummary.aspx directly. Skipping JS, layout
+and rendering makes each page far cheaper, and unlike a Playwright page the
+client is safe to share across threads.
+"""
+
+import gzip
+import urllib.request
+from urllib.parse import urlsplit
+
+from playwright.sync_api import BrowserContext, Page
+
+import config
+from browser import LoginError
+
+
+class HttpFetcher:
+    """GETs portal pages with the logged-in browser session's cookies."""
+
+    def __init__(self, cookies: list[dict], user_agent: str):
+        self.cookie_header = "; ".join(f"{c['name']}={c['value']}" for c in cookies)
+        self.user_agent = user_agent
+
+    @classmethod
+    def from_browser(cls, context: BrowserContext, page: Page) -> "HttpFetcher":
+        """Build a fetcher from a logged-in context, reusing its user agent."""
+        return cls(context.cookies([config.ENERGYLINK_URL]),
+                   page.evaluate("navigator.userAgent"))
+
+    def get(self, url: str) -> str:
+        """Fetch a page and return its HTML. Raises LoginError if the session has expired."""
+        request = urllib.request.Request(url, headers={
+            "User-Agent": self.user_agent,
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Encoding": "gzip",
+        })
+        # Unredirected so the session cookie is never sent to another host
+        request.add_unredirected_header("Cookie", self.cookie_header)
+
+        with urllib.request.urlopen(request, timeout=config.NAV_TIMEOUT / 1000) as response:
+            final_url = response.geturl()
+            body = response.read()
+            if response.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            charset = response.headers.get_content_charset() or "utf-8"
+
+        # An expired session redirects away (landing page or Auth0 login)
+        if urlsplit(final_url)[:3] != urlsplit(url)[:3]:
+            raise LoginError(f"HTTP session is no longer logged in (redirected to {final_url})")
+
+        return body.decode(charset, errors="replace")
@@ -2,13 +2,21 @@
 
 Extracts structured data from the Invoices/Checks grid, Invoice Summary,
 and Statement Summary pages using Playwright DOM queries.
+
+Each table is pulled out of the browser with a single evaluate() call that
+returns plain row/cell arrays; the rules for categories, totals and codes
+then run in Python on those arrays. Per-cell locator calls are one IPC round
+trip each, so a 40-row statement used to cost hundreds of them.
+
+The *_html variants build the same arrays from raw HTML via html_tables, for
+pages fetched over HTTP without rendering.
 """
 
 import re
-import time
 from playwright.sync_api import Page
 
-import config
+import html_tables
+from readiness import grid_signature, wait_for_grid_rows, wait_for_statement_table
 
 
 def _parse_money(text: str) -> float | None:
@@ -50,71 +58,118 @@ def _extract_id_from_href(href: str, param: str) -> int | None:
     return int(match.group(1)) if match else None
 
 
+# --- In-page extraction scripts ---
+# Each returns plain JSON so a whole table crosses the IPC boundary at once.
+# innerText matches what Locator.inner_text() returns.
+
+# Evaluated on an AG Grid .ag-center-cols-container.
+# Returns [{"row_id": "...", "cols": {col_id: text}}, ...]
+_GRID_ROWS_JS = """
+(container) => Array.from(container.querySelectorAll(".ag-row")).map(row => {
+    const cols = {};
+    row.querySelectorAll(".ag-cell[col-id]").forEach(cell => {
+        const id = cell.getAttribute("col-id");
+        if (!(id in cols)) cols[id] = cell.innerText;
+    });
+    return {row_id: row.getAttribute("row-id"), cols: cols};
+})
+"""
+
+# Evaluated on a table element, or on the page (root is then undefined and
+# the whole document is used). Returns, for every <tr> under root:
+# {"text": row innerText, "cells": [td innerText, ...], "href": first
+#  StatementId link href or null}
+_TABLE_ROWS_JS = """
+(root) => Array.from((root || document).querySelectorAll("tr")).map(tr => {
+    const link = tr.querySelector("a[href*='StatementId']");
+    return {
+        text: tr.innerText,
+        cells: Array.from(tr.querySelectorAll("td")).map(td => td.innerText),
+        href: link ? link.getAttribute("href") : null,
+    };
+})
+"""
+
+# Fallback when no table has a known category row: the last table with more
+# than 5 rows whose text has "Code", "Type Desc" and "ROYALTY".
+# Returns the same shape as _TABLE_ROWS_JS, or null if nothing matches.
+_DETAIL_TABLE_FALLBACK_JS = """
+() => {
+    const tables = Array.from(document.querySelectorAll("table")).reverse();
+    const t = tables.find(t => {
+        if (t.querySelectorAll("tr").length <= 5) return false;
+        const text = t.innerText;
+        return text.includes("Code") && text.includes("Type Desc") && text.includes("ROYALTY");
+    });
+    if (!t) return null;
+    return Array.from(t.querySelectorAll("tr")).map(tr => ({
+        text: tr.innerText,
+        cells: Array.from(tr.querySelectorAll("td")).map(td => td.innerText),
+        href: null,
+    }));
+}
+"""
+
+
 # --- Invoice List (AG Grid on Invoices/Checks tab) ---
 
 def parse_invoice_list(page: Page) -> list[dict]:
     """Parse all invoices from the AG Grid on the Invoices/Checks tab.
 
+    Returns a list of dicts.
+    """
+    return [inv for invoices in iter_invoice_pages(page) for inv in invoices]
+
+
+def iter_invoice_pages(page: Page):
+    """Walk the AG Grid on the Invoices/Checks tab one page at a time.
+
     The AG Grid renders as divs with .ag-row / .ag-cell classes, and also
     uses ARIA roles (role='row', role='gridcell'). The InvoiceId comes from
     links to InvoiceSummary.aspx in the Total column.
 
-    Returns a list of dicts.
+    Yields each grid page's invoices as a list of dicts. The next page is
+    only loaded when the caller asks for it, so a caller can stop early.
     """
-    all_invoices = []
-
     # There are two AG Grids on the page (Dashboard + Invoices/Checks).
     # The Invoices grid rows have 12 cells including col-id='status'.
     # We identify it by finding .ag-center-cols-container that has
     # rows with the 'status' column cell.
-    containers = page.locator(".ag-center-cols-container").all()
-    invoices_container = None
-    for c in containers:
-        if c.locator(".ag-row .ag-cell[col-id='status']").count() > 0:
-            invoices_container = c
-            break
-
-    if not invoices_container:
-        return all_invoices
+    invoices_container = page.locator(
+        ".ag-center-cols-container:has(.ag-row .ag-cell[col-id='status'])"
+    ).first
 
     # Wait for rows to be present
-    try:
-        invoices_container.locator(".ag-row").first.wait_for(
-            state="visible", timeout=config.GRID_TIMEOUT
-        )
-    except Exception:
-        return all_invoices
+    if not wait_for_grid_rows(page):
+        return
 
     # The pagination controls are siblings of the grid, find them at page level
     while True:
-        invoices_on_page = _parse_grid_page(invoices_container)
-        all_invoices.extend(invoices_on_page)
+        yield _parse_grid_page(invoices_container)
 
         if not _go_to_next_grid_page(page):
             break
 
-    return all_invoices
-
 
 def _parse_grid_page(container) -> list[dict]:
     """Parse invoice rows from the current AG Grid page."""
-    invoices = []
+    return _invoices_from_grid_rows(container.evaluate(_GRID_ROWS_JS))
 
-    # Target .ag-row elements inside the Invoices container
-    rows = container.locator(".ag-row").all()
 
+def _invoices_from_grid_rows(rows: list[dict]) -> list[dict]:
+    """Turn the output of _GRID_ROWS_JS into invoice dicts."""
+    invoices = []
     for row in rows:
         try:
-            invoice = _parse_grid_row(row)
+            invoice = _parse_grid_row(row["row_id"], row["cols"])
             if invoice and invoice.get("invoice_id"):
                 invoices.append(invoice)
         except Exception:
             continue
-
     return invoices
 
 
-def _parse_grid_row(row) -> dict | None:
+def _parse_grid_row(row_id: str | None, cols: dict) -> dict | None:
     """Parse a single AG Grid row into an invoice dict.
 
     Uses col-id attributes for reliable cell identification:
@@ -124,16 +179,12 @@ def _parse_grid_row(row) -> dict | None:
     The row-id attribute contains the InvoiceId directly.
     """
     # Get InvoiceId from the row-id attribute
-    row_id = row.get_attribute("row-id")
     if not row_id or not row_id.isdigit():
         return None
     invoice_id = int(row_id)
 
     def col(col_id):
-        cell = row.locator(f".ag-cell[col-id='{col_id}']")
-        if cell.count() > 0:
-            return _clean(cell.first.inner_text())
-        return ""
+        return _clean(cols.get(col_id, ""))
 
     # Invoice/Check column: "110355\n2026-01-30"
     invoice_text = col("invoice")
@@ -190,14 +241,15 @@ def _go_to_next_grid_page(page) -> bool:
         if current_page >= total_pages:
             return False
 
-        # Navigate by filling the page input with the next page number
+        # Navigate by filling the page input with the next page number,
+        # then wait until the grid shows a different set of rows
+        previous_rows = grid_signature(page)
         next_page = current_page + 1
         page_input.click()
         page_input.fill(str(next_page))
         page_input.press("Enter")
 
-        time.sleep(2)
-        return True
+        return wait_for_grid_rows(page, previous_rows)
 
     except Exception:
         return False
@@ -212,31 +264,42 @@ def parse_invoice_summary(page: Page, invoice_id: int) -> dict:
       invoice_id, check_number, total_revenue, total_tax,
       total_deductions, total_amount, properties (list of dicts)
     """
+    # Both the financials and the properties table come from the same
+    # snapshot of every <tr> on the page
+    return _invoice_summary_from_rows(page.evaluate(_TABLE_ROWS_JS), invoice_id)
+
+
+def parse_invoice_summary_html(html: str, invoice_id: int) -> dict:
+    """Parse raw Invoice Summary HTML (no browser needed). Same result as parse_invoice_summary."""
+    return _invoice_summary_from_rows(html_tables.table_rows(html_tables.parse_html(html)), invoice_id)
+
+
+def _invoice_summary_from_rows(rows: list[dict], invoice_id: int) -> dict:
+    """Build the invoice summary dict from the output of _TABLE_ROWS_JS."""
     result = {"invoice_id": invoice_id, "properties": []}
 
     # Parse financial summary from the labeled table
     # The financials are in a table with rows like:
     #   "Check Number" | "110355"
     #   "Revenue"      | "6,776.94"
-    result.update(_parse_invoice_financials(page))
+    result.update(_parse_invoice_financials(rows))
 
     # Parse properties table
-    result["properties"] = _parse_properties_table(page, invoice_id)
+    result["properties"] = _parse_properties_table(rows, invoice_id)
 
     return result
 
 
-def _parse_invoice_financials(page: Page) -> dict:
+def _parse_invoice_financials(rows: list[dict]) -> dict:
     """Extract check number, revenue, tax, deductions, total from invoice summary."""
     financials = {}
 
-    # Find all table rows and look for labeled value pairs
-    rows = page.locator("tr").all()
+    # Look through all table rows for labeled value pairs
     for row in rows:
-        cells = row.locator("td").all()
+        cells = row["cells"]
         if len(cells) == 2:
-            label = _clean(cells[0].inner_text())
-            value = _clean(cells[1].inner_text())
+            label = _clean(cells[0])
+            value = _clean(cells[1])
 
             if label == "Check Number":
                 financials["check_number"] = value
@@ -252,14 +315,14 @@ def _parse_invoice_financials(page: Page) -> dict:
     return financials
 
 
-def _parse_properties_table(page: Page, invoice_id: int) -> list[dict]:
+def _parse_properties_table(rows: list[dict], invoice_id: int) -> list[dict]:
     """Parse the properties/wells table from an Invoice Summary page."""
     properties = []
 
     # Property rows contain links to StatementSummary
-    rows = page.locator("tr:has(a[href*='StatementId'])").all()
-
     for row in rows:
+        if not row["href"]:
+            continue
         try:
             prop = _parse_property_row(row, invoice_id)
             if prop and prop.get("statement_id"):
@@ -270,7 +333,7 @@ def _parse_properties_table(page: Page, invoice_id: int) -> list[dict]:
     return properties
 
 
-def _parse_property_row(row, invoice_id: int) -> dict | None:
+def _parse_property_row(row: dict, invoice_id: int) -> dict | None:
     """Parse a single property row from the invoice summary.
 
     Row structure (td cells):
@@ -285,16 +348,12 @@ def _parse_property_row(row, invoice_id: int) -> dict | None:
       8: Total (e.g., "492.52")
     """
     # Get StatementId from link
-    statement_id = None
-    link = row.locator("a[href*='StatementId']").first
-    href = link.get_attribute("href") or ""
-    statement_id = _extract_id_from_href(href, "StatementId")
+    statement_id = _extract_id_from_href(row["href"] or "", "StatementId")
 
     if not statement_id:
         return None
 
-    cells = row.locator("td").all()
-    cell_texts = [_clean(c.inner_text()) for c in cells]
+    cell_texts = [_clean(c) for c in row["cells"]]
 
     # Find the cost center column (9+ digit numeric string)
     cost_center_idx = None
@@ -326,6 +385,17 @@ def _parse_property_row(row, invoice_id: int) -> dict | None:
 
 # --- Statement Summary Page ---
 
+# Different operators use different category names:
+#   TGNR: "PLANT PRODUCTS", "RESIDUE GAS", "OIL"
+#   Sheridan/EXCO: "GAS DELIVERED TO PLANT", "GAS RESIDUE", "NGL"
+_CATEGORY_SELECTORS = [
+    "PLANT PRODUCTS", "RESIDUE GAS", "OIL",
+    "GAS DELIVERED TO PLANT", "GAS RESIDUE", "NGL",
+    "GAS", "CONDENSATE", "CRUDE OIL",
+]
+_DETAIL_TABLE_SELECTOR = ", ".join(f"table:has(td:text-is('{cat}'))" for cat in _CATEGORY_SELECTORS)
+
+
 def parse_statement_details(page: Page, statement_id: int) -> list[dict]:
     """Parse line items from a Statement Summary page.
 
@@ -336,48 +406,41 @@ def parse_statement_details(page: Page, statement_id: int) -> list[dict]:
     - Data rows: 12 cells (code, type, date, btu, vol, price, val, owner%, dist%, vol, val, empty)
     - Subtotal rows: "Total for PLANT PRODUCTS", "Total for RESIDUE GAS", "Total for Statement"
     """
-    details = []
-    current_category = ""
-
     # The detail table has rows with product codes (e.g., "400.RI", "GDP.RI").
     # There may be two tables with "Code" headers (frozen header + data table).
-    # We want the one that contains data rows with category headers.
-    # Different operators use different category names:
-    #   TGNR: "PLANT PRODUCTS", "RESIDUE GAS", "OIL"
-    #   Sheridan/EXCO: "GAS DELIVERED TO PLANT", "GAS RESIDUE", "NGL"
-    # Find the data table by looking for any of these category names.
-    _CATEGORY_SELECTORS = [
-        "PLANT PRODUCTS", "RESIDUE GAS", "OIL",
-        "GAS DELIVERED TO PLANT", "GAS RESIDUE", "NGL",
-        "GAS", "CONDENSATE", "CRUDE OIL",
-    ]
-    selector = ", ".join(f"table:has(td:text-is('{cat}'))" for cat in _CATEGORY_SELECTORS)
-    detail_table = page.locator(selector).last
-
+    # We want the one that contains data rows with category headers, found
+    # by looking for any of the known category names.
     try:
-        detail_table.wait_for(state="visible", timeout=config.LOAD_TIMEOUT)
+        wait_for_statement_table(page, _DETAIL_TABLE_SELECTOR)
+        rows = page.locator(_DETAIL_TABLE_SELECTOR).last.evaluate(_TABLE_ROWS_JS)
     except Exception:
         # Fallback: find tables with "Code" header and data rows
-        detail_table = None
-        all_tables = page.locator("table").all()
-        for t in reversed(all_tables):
-            rows_in_table = t.locator("tr").count()
-            if rows_in_table > 5:
-                text = t.inner_text()
-                if "Code" in text and "Type Desc" in text and "ROYALTY" in text:
-                    detail_table = t
-                    break
-        if detail_table is None:
-            return details
-
-    rows = detail_table.locator("tr").all()
+        rows = page.evaluate(_DETAIL_TABLE_FALLBACK_JS)
+        if rows is None:
+            return []
+
+    return _details_from_rows(rows, statement_id)
+
+
+def parse_statement_details_html(html: str, statement_id: int) -> list[dict]:
+    """Parse line items from raw Statement Summary HTML (no browser needed)."""
+    rows = html_tables.detail_table_rows(html_tables.parse_html(html), _CATEGORY_SELECTORS)
+    if rows is None:
+        return []
+    return _details_from_rows(rows, statement_id)
+
+
+def _details_from_rows(rows: list[dict], statement_id: int) -> list[dict]:
+    """Turn the detail table's rows (see _TABLE_ROWS_JS) into line item dicts."""
+    details = []
+    current_category = ""
 
     for row in rows:
-        cells = row.locator("td").all()
+        cells = row["cells"]
         if not cells:
             continue  # header row (th cells)
 
-        row_text = _clean(row.inner_text())
+        row_text = _clean(row["text"])
         cell_count = len(cells)
 
         # Skip header-like rows
@@ -390,13 +453,13 @@ def parse_statement_details(page: Page, statement_id: int) -> list[dict]:
 
         # Category header: single cell (or few cells) with all-caps text
         if cell_count == 1:
-            cat_text = _clean(cells[0].inner_text())
+            cat_text = _clean(cells[0])
             if cat_text and cat_text.isupper() and not cat_text.startswith("Total"):
                 current_category = cat_text
             continue
 
         # Subtotal/total rows: starts with "Total for ..."
-        first_cell_text = _clean(cells[0].inner_text())
+        first_cell_text = _clean(cells[0])
         if first_cell_text.startswith("Total for") or first_cell_text == "Total":
             continue
 
@@ -412,7 +475,7 @@ def parse_statement_details(page: Page, statement_id: int) -> list[dict]:
         if not code or not re.match(r"^\w+\.\w+$", code):
             continue
 
-        cell_texts = [_clean(c.inner_text()) for c in cells]
+        cell_texts = [_clean(c) for c in cells]
 
         details.append({
             "statement_id": statement_id,
@@ -0,0 +1,182 @@
+"""Work-queue bookkeeping shared by the sync and async scrape engines.
+
+Scans the invoice grid for new invoices, claims and resumes work items,
+builds fetch jobs and stores parsed pages. Lives outside scraper.py so
+async_scraper doesn't import the entry module a second time.
+"""
+
+from typing import Callable
+
+import archive
+import config
+import db
+from browser import invoice_summary_url, statement_url
+from readiness import wait_for_properties_table
+from run_log import RunLogger
+
+
+def new_scan() -> dict:
+    """State of an incremental walk over the invoice grid."""
+    return {"pages": 0, "invoices": 0, "new": 0, "known_streak": 0, "stop": False}
+
+
+def scan_grid_page(conn, run_id: int, logger: RunLogger, scan: dict,
+                   grid_invoices: list[dict], stats: dict) -> list[dict]:
+    """Filter one grid page down to the invoices not yet stored or queued,
+    and claim those as work items.
+
+    Checks the whole page with one query. Sets scan["stop"] once paging can
+    end: after KNOWN_PAGES_BEFORE_STOP pages in a row with nothing new
+    (unless FULL_SCAN), or after the first new invoice in DEBUG mode.
+    """
+    known = db.existing_invoice_ids(conn, [inv["invoice_id"] for inv in grid_invoices])
+    unprocessed = [inv for inv in grid_invoices if inv["invoice_id"] not in known]
+    # Queued invoices are counted as processed once the resume path stores them
+    stats["skipped"] += sum(known.values())
+
+    scan["pages"] += 1
+    scan["invoices"] += len(grid_invoices)
+    scan["known_streak"] = 0 if unprocessed else scan["known_streak"] + 1
+    logger.log("INFO",
+               f"Grid page {scan['pages']}: {len(grid_invoices)} invoices, "
+               f"{len(unprocessed)} new")
+
+    if config.DEBUG and unprocessed:
+        unprocessed = unprocessed[:1]
+        scan["stop"] = True
+        logger.log("INFO", "DEBUG mode: processing only first unprocessed invoice")
+    elif not config.FULL_SCAN and scan["known_streak"] >= config.KNOWN_PAGES_BEFORE_STOP:
+        scan["stop"] = True
+        logger.log("INFO",
+                   f"Stopping grid scan: last {scan['known_streak']} page(s) had no new invoices")
+
+    with db.unit_of_work(conn):
+        db.claim_new_invoices(conn, run_id, unprocessed)
+    scan["new"] += len(unprocessed)
+    return unprocessed
+
+
+def log_scan(logger: RunLogger, scan: dict, stats: dict) -> None:
+    logger.log("INFO",
+               f"Scanned {scan['pages']} grid page(s): {scan['invoices']} invoices, "
+               f"{scan['new']} new, {stats['skipped']} already in DB")
+
+
+def resume_jobs(conn, run_id: int, logger: RunLogger) -> list[dict]:
+    """Requeue work left over from earlier runs: items a crashed run had
+    claimed, and failed items with attempts left. Returns their jobs."""
+    with db.unit_of_work(conn):
+        reset = db.reset_work(conn, config.MAX_ATTEMPTS)
+        items = [] if config.DEBUG else db.claim_pending_work(conn, run_id)
+    if reset["stale"] or reset["retried"]:
+        logger.log("INFO",
+                   f"Work queue: {reset['stale']} interrupted and {reset['retried']} "
+                   f"failed item(s) pending again")
+    if config.DEBUG and (reset["stale"] or reset["retried"]):
+        logger.log("INFO", "DEBUG mode: leaving pending work items for a normal run")
+    if items:
+        logger.log("INFO", f"Resuming {len(items)} work item(s) from earlier runs")
+
+    jobs = []
+    for item in items:
+        if item["kind"] == "invoice":
+            jobs.append(invoice_job(item["invoice"]))
+        else:
+            jobs.append(statement_job(item["item_id"], item["invoice_id"]))
+    return jobs
+
+
+def invoice_job(inv: dict) -> dict:
+    invoice_id = inv["invoice_id"]
+    return {"kind": "invoice", "id": invoice_id, "url": invoice_summary_url(invoice_id),
+            "ready": wait_for_properties_table, "invoice": inv}
+
+
+def statement_job(statement_id: int, invoice_id: int) -> dict:
+    return {"kind": "statement", "id": statement_id, "url": statement_url(statement_id),
+            "invoice_id": invoice_id}
+
+
+def _statement_ids(summary: dict) -> list[int]:
+    """Statement IDs of a parsed invoice summary, in page order and without repeats."""
+    return list(dict.fromkeys(p["statement_id"] for p in summary.get("properties", [])))
+
+
+def store_invoice(conn, run_id: int, logger: RunLogger, inv: dict, summary: dict) -> list[int]:
+    """Store a parsed invoice summary: the invoice and its properties.
+
+    Written in one transaction with the invoice's statements being queued
+    and its work item being marked done. Returns the statement IDs to fetch.
+    """
+    invoice_id = inv["invoice_id"]
+
+    # Merge grid data with summary data
+    invoice_data = {**inv}
+    if summary.get("check_number"):
+        invoice_data["check_number"] = summary["check_number"]
+    if summary.get("total_revenue") is not None:
+        invoice_data["total_revenue"] = summary["total_revenue"]
+    if summary.get("total_tax") is not None:
+        invoice_data["total_tax"] = summary["total_tax"]
+    if summary.get("total_deductions") is not None:
+        invoice_data["total_deductions"] = summary["total_deductions"]
+    if summary.get("total_amount") is not None:
+        invoice_data["total_amount"] = summary["total_amount"]
+
+    properties = summary.get("properties", [])
+    with db.unit_of_work(conn):
+        db.insert_invoice(conn, run_id, invoice_data)
+        db.insert_properties(conn, invoice_id, properties)
+        statement_ids = db.claim_new_statements(conn, run_id, invoice_id,
+                                                _statement_ids(summary))
+        db.complete_work(conn, "invoice", invoice_id)
+
+    logger.log("INFO",
+               f"Inserted invoice {invoice_id}: {invoice_data.get('operator')} "
+               f"check #{invoice_data.get('check_number')}")
+    logger.log("INFO",
+               f"Invoice {invoice_id} has {len(properties)} properties")
+    return statement_ids
+
+
+def store_statement(conn, logger: RunLogger, statement_id: int, details: list[dict]) -> None:
+    """Store the parsed line items of one statement and mark it done.
+
+    Replaces any rows already stored for it, as a --reparse of a failed
+    statement leaves them.
+    """
+    with db.unit_of_work(conn):
+        db.delete_statement_details(conn, statement_id)
+        db.insert_statement_details(conn, statement_id, details)
+        db.complete_work(conn, "statement", statement_id)
+    logger.log("INFO",
+               f"Statement {statement_id}: {len(details)} line items")
+
+
+def fail_item(conn, logger: RunLogger, kind: str, item_id: int, error: Exception) -> None:
+    """Mark a work item failed; the next run retries it."""
+    with db.unit_of_work(conn):
+        db.fail_work(conn, kind, item_id, str(error))
+    logger.log("WARNING", f"Error processing {kind} {item_id}: {error}")
+
+
+def archive_page(logger: RunLogger, run_id: int, kind: str, item_id: int,
+                 read_html: Callable[[], str]) -> None:
+    """Archive a fetched page, whose HTML read_html returns. A failure, reading
+    the page included, is logged, not raised, so it never replaces the parse
+    or store error of the page being archived."""
+    try:
+        archive.save(run_id, kind, item_id, read_html())
+    except Exception as e:
+        logger.log("WARNING", f"Could not archive {kind} {item_id}: {e}")
+
+
+async def archive_rendered_page(logger: RunLogger, run_id: int, kind: str, item_id: int,
+                                page) -> None:
+    """archive_page for an async Playwright page, read under the same guard."""
+    try:
+        html = await page.content()
+    except Exception as e:
+        logger.log("WARNING", f"Could not archive {kind} {item_id}: {e}")
+        return
+    archive_page(logger, run_id, kind, item_id, lambda: html)
@@ -0,0 +1,161 @@
+"""Event-driven page readiness for EnergyLink scraper.
+
+Replaces fixed time.sleep() calls with waits on concrete signals: the login
+flow reaching a recognizable state, URL transitions, the invoice properties
+table, the statement detail table, and AG Grid rows rendering. Every wait is
+timed and recorded in TIMINGS so a run can report where time actually went.
+"""
+
+import time
+from contextlib import contextmanager
+
+from playwright.sync_api import Page
+
+import config
+
+
+class WaitTimings:
+    """Collects how long each kind of readiness wait took."""
+
+    def __init__(self):
+        self.waits = {}
+
+    def record(self, name: str, seconds: float, ok: bool = True) -> None:
+        entry = self.waits.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0})
+        entry["count"] += 1
+        entry["total"] += seconds
+        entry["max"] = max(entry["max"], seconds)
+        if not ok:
+            entry["timeouts"] += 1
+
+    def summary(self) -> str:
+        """One line per wait kind: count, average, max and timeouts."""
+        lines = []
+        for name, e in sorted(self.waits.items()):
+            avg = e["total"] / e["count"] if e["count"] else 0.0
+            lines.append(f"{name}: n={e['count']} avg={avg:.2f}s max={e['max']:.2f}s "
+                         f"timeouts={e['timeouts']}")
+        return "; ".join(lines)
+
+
+TIMINGS = WaitTimings()
+
+
+@contextmanager
+def timed(name: str):
+    """Record the duration of the enclosed wait.
+
+    Yields a dict; set its "ok" key to False to count the wait as a timeout.
+    A raised exception also counts as a timeout.
+    """
+    start = time.monotonic()
+    state = {"ok": True}
+    try:
+        yield state
+    except Exception:
+        state["ok"] = False
+        raise
+    finally:
+        TIMINGS.record(name, time.monotonic() - start, state["ok"])
+
+
+# --- In-page predicates (shared with the async engine) ---
+
+# Returns the first of the requested login-flow signals that is present, or
+# false. Signals: dashboard, mfa, login_form, password, sign_in_link.
+LOGIN_STATE_JS = """
+(signals) => {
+    const href = location.href;
+    const visible = sel => Array.from(document.querySelectorAll(sel))
+        .some(el => el.offsetParent !== null);
+    const text = document.body ? document.body.innerText : "";
+    const checks = {
+        dashboard: () => href.includes("/Core/BSP/Dashboard"),
+        mfa: () => href.toLowerCase().includes("mfa-sms-challenge")
+            || text.includes("Verify Your Identity") || text.includes("Enter the code"),
+        login_form: () => visible('input[name="email"], input[type="email"], input[name="username"], '
+            + 'input[name="password"], input[type="password"]'),
+        password: () => visible('input[name="password"], input[type="password"]'),
+        sign_in_link: () => Array.from(document.querySelectorAll("a"))
+            .some(a => a.innerText.includes("SIGN IN")),
+    };
+    return signals.find(s => checks[s]()) || false;
+}
+"""
+
+# Signature of the rows currently rendered in the Invoices/Checks grid
+# (sorted row-ids), or "" while the grid is empty.
+_GRID_SIGNATURE = """
+(() => {
+    const c = Array.from(document.querySelectorAll(".ag-center-cols-container"))
+        .find(c => c.querySelector(".ag-row .ag-cell[col-id='status']"));
+    if (!c) return "";
+    return Array.from(c.querySelectorAll(".ag-row"))
+        .map(r => r.getAttribute("row-id")).sort().join(",");
+})()
+"""
+GRID_SIGNATURE_JS = f"() => {_GRID_SIGNATURE}"
+GRID_CHANGED_JS = f"(old) => {{ const sig = {_GRID_SIGNATURE}; return sig !== '' && sig !== old; }}"
+
+PROPERTIES_TABLE_SELECTOR = "tr:has(a[href*='StatementId'])"
+
+
+# --- Sync waits ---
+
+def wait_for_login_state(page: Page, signals: list[str], timeout: float) -> str | None:
+    """Wait until one of the login-flow signals is present. Returns it, or None on timeout."""
+    with timed("login_state") as t:
+        try:
+            return page.wait_for_function(LOGIN_STATE_JS, arg=signals, timeout=timeout).json_value()
+        except Exception:
+            t["ok"] = False
+            return None
+
+
+def wait_for_url_change(page: Page, old_url: str, timeout: float) -> bool:
+    """Wait until the page URL differs from old_url. Returns False on timeout."""
+    with timed("url_change") as t:
+        try:
+            page.wait_for_url(lambda url: url != old_url, timeout=timeout)
+            return True
+        except Exception:
+            t["ok"] = False
+            return False
+
+
+def wait_for_properties_table(page: Page) -> bool:
+    """Wait for the invoice summary's properties table. Returns False on timeout."""
+    with timed("properties_table") as t:
+        try:
+            page.locator(PROPERTIES_TABLE_SELECTOR).first.wait_for(
+                state="attached", timeout=config.LOAD_TIMEOUT
+            )
+            return True
+        except Exception:
+            t["ok"] = False
+            return False
+
+
+def wait_for_statement_table(page: Page, selector: str) -> None:
+    """Wait for the statement detail table to be visible. Raises on timeout."""
+    with timed("statement_table"):
+        page.locator(selector).last.wait_for(state="visible", timeout=config.LOAD_TIMEOUT)
+
+
+def grid_signature(page: Page) -> str:
+    return page.evaluate(GRID_SIGNATURE_JS)
+
+
+def wait_for_grid_rows(page: Page, previous: str = "") -> bool:
+    """Wait for the Invoices/Checks grid to render rows different from `previous`.
+
+    Pass the grid_signature() taken before paging to wait for the next page;
+    with the default the first render is awaited. Returns False on timeout.
+    """
+    with timed("grid_rows") as t:
+        try:
+            page.wait_for_function(GRID_CHANGED_JS, arg=previous, timeout=config.GRID_TIMEOUT)
+            return True
+        except Exception:
+            t["ok"] = False
+            return False
@@ -0,0 +1,89 @@
+"""Offline re-parse of archived pages.
+
+Rebuilds properties and statement_details from the raw page archive with no
+browser. Pages are decompressed and parsed in parallel across CPU cores; the
+results are written to the DB from the main process.
+
+Invoked via `python scraper.py --reparse`; run bookkeeping stays in
+scraper.main.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import archive
+import config
+import db
+from parsers import parse_invoice_summary_html, parse_statement_details_html
+from run_log import RunLogger
+
+
+def _parse_page(task: tuple) -> tuple:
+    """Parse one archived page (runs in a worker process).
+
+    Returns (kind, page_id, parsed, error); exactly one of parsed/error is set.
+    """
+    kind, page_id, path = task
+    try:
+        html = archive.load(path)
+        if kind == "invoice":
+            return kind, page_id, parse_invoice_summary_html(html, page_id), None
+        return kind, page_id, parse_statement_details_html(html, page_id), None
+    except Exception as e:
+        return kind, page_id, None, f"{path}: {e}"
+
+
+def run(conn, run_id: int, stats: dict, logger: RunLogger, workers: int | None = None) -> None:
+    """Re-derive properties and statement details from the archive, updating stats in place."""
+    invoice_pages = archive.latest_pages("invoice")
+    statement_pages = archive.latest_pages("statement")
+    logger.log("INFO",
+               f"Re-parsing {len(invoice_pages)} invoice and {len(statement_pages)} "
+               f"statement pages from {config.ARCHIVE_DIR}")
+
+    # Properties reference invoices, so only invoices already in the DB can
+    # be rebuilt. Invoice tasks come first so their properties exist before
+    # the statement details that reference them.
+    known_invoices = db.get_invoice_ids(conn)
+    tasks = [("invoice", i, p) for i, p in sorted(invoice_pages.items()) if i in known_invoices]
+    tasks += [("statement", s, p) for s, p in sorted(statement_pages.items())]
+    stats["skipped"] += len(invoice_pages) - sum(1 for t in tasks if t[0] == "invoice")
+
+    statements_rebuilt = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for kind, page_id, parsed, error in executor.map(_parse_page, tasks, chunksize=16):
+            if error:
+                logger.log("WARNING", f"Error re-parsing {kind} {page_id}: {error}")
+                continue
+
+            if kind == "invoice":
+                with db.unit_of_work(conn):
+                    for prop in parsed["properties"]:
+                        db.upsert_property(conn, page_id, prop)
+                stats["processed"] += 1
+                continue
+
+            if not db.property_exists(conn, page_id):
+                logger.log("WARNING",
+                           f"Statement {page_id} is archived but has no property row; skipped")
+                continue
+            # Never replace stored line items with an empty parse
+            if not parsed:
+                logger.log("WARNING",
+                           f"Statement {page_id}: no line items parsed; kept existing rows")
+                continue
+            # A statement that failed to scrape is done once its archive parses
+            with db.unit_of_work(conn):
+                db.delete_statement_details(conn, page_id)
+                db.insert_statement_details(conn, page_id, parsed)
+                db.complete_work(conn, "statement", page_id)
+            statements_rebuilt += 1
+
+    # Re-parsed invoices can rename properties, which the incremental cube
+    # and dimension updates do not follow
+    with db.unit_of_work(conn):
+        db.rebuild_detail_cube(conn)
+        db.rebuild_dimensions(conn)
+
+    logger.log("INFO",
+               f"Re-parse rebuilt {stats['processed']} invoices and {statements_rebuilt} statements")
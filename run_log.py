@@ -0,0 +1,84 @@
+"""Buffered run logger for EnergyLink scraper.
+
+Log records go into an in-memory buffer and are written to scrape_logs in
+batches by a background thread with its own DB connection, so a log call on
+the scrape's hot path costs a list append and a print. The buffer is flushed
+once it holds config.LOG_FLUSH_SIZE records, every config.LOG_FLUSH_INTERVAL
+seconds, and on close().
+"""
+
+import sys
+import threading
+
+import config
+import db
+
+
+class RunLogger:
+    """Buffers a run's log records and writes them from a background thread.
+
+    log() is safe to call from any thread and from the async engine's event
+    loop. Call close() (or use it as a context manager) to flush the rest.
+    """
+
+    def __init__(self, run_id: int, flush_size: int = None, flush_interval: float = None,
+                 echo: bool = True):
+        self.run_id = run_id
+        self.flush_size = flush_size or config.LOG_FLUSH_SIZE
+        self.flush_interval = flush_interval or config.LOG_FLUSH_INTERVAL
+        self.echo = echo
+        self._buffer = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._writer, name="run-log-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, level: str, message: str) -> None:
+        """Queue a record (timestamped now) and echo it to stdout."""
+        if self.echo:
+            print(f"[{level}] {message}", flush=True)
+        with self._cond:
+            # Records after close() are only echoed
+            if self._closed:
+                return
+            self._buffer.append((self.run_id, db.now(), level, message))
+            if len(self._buffer) >= self.flush_size:
+                self._cond.notify()
+
+    def close(self) -> None:
+        """Flush all buffered records and stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _writer(self) -> None:
+        conn = db.get_connection()
+        try:
+            while True:
+                with self._cond:
+                    if not self._closed and len(self._buffer) < self.flush_size:
+                        self._cond.wait(self.flush_interval)
+                    batch, self._buffer = self._buffer, []
+                    closed = self._closed
+                if batch:
+                    self._flush(conn, batch)
+                # Nothing can be buffered once closed is set, so this batch was the last
+                if closed:
+                    return
+        finally:
+            conn.close()
+
+    def _flush(self, conn, batch: list[tuple]) -> None:
+        try:
+            db.insert_logs(conn, batch)
+        except Exception as e:
+            # Losing log lines must never take down the scrape
+            print(f"[ERROR] Could not write {len(batch)} log records: {e}",
+                  file=sys.stderr, flush=True)
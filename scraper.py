@@ -8,182 +8,222 @@ Always runs headed so the user can complete MFA if needed.
 Usage:
     python scraper.py                  # normal mode
     python scraper.py --debug          # process only first unprocessed invoice
+    python scraper.py --workers 4      # fetch with 4 browser pages in parallel
+    python scraper.py --async          # use the asyncio Playwright engine
+    python scraper.py --fetch http     # fetch summary pages as raw HTML (no rendering)
+    python scraper.py --reparse        # rebuild properties/details from archived pages
+    python scraper.py --no-archive     # don't keep compressed copies of fetched pages
+    python scraper.py --full-scan      # walk every grid page instead of stopping early
 """
 
 import argparse
+import asyncio
 import sys
 import traceback
+from collections import deque
 
 import config
 import db
+import pipeline
 from browser import (
     launch_browser,
     close_browser,
     login,
     navigate_to_invoices,
-    navigate_to_invoice_summary,
-    navigate_to_statement,
     MFARequiredError,
     LoginError,
 )
-from parsers import parse_invoice_list, parse_invoice_summary, parse_statement_details
+from http_fetch import HttpFetcher
+from parsers import (
+    iter_invoice_pages,
+    parse_invoice_summary,
+    parse_statement_details,
+    parse_invoice_summary_html,
+    parse_statement_details_html,
+)
+from readiness import TIMINGS
+from run_log import RunLogger
+from workers import HttpPool, PagePool, RateLimiter
 
 
 def main():
     args = parse_args()
     config.DEBUG = args.debug
+    config.WORKERS = max(1, args.workers)
+    config.FETCH_MODE = args.fetch
+    config.ARCHIVE_PAGES = not args.no_archive
+    config.FULL_SCAN = args.full_scan
 
     # Initialize database
     conn = db.get_connection()
     db.init_db(conn)
     run_id = db.create_run(conn)
-    db.log(conn, run_id, "INFO", f"Scrape run started (debug={config.DEBUG})")
+    logger = RunLogger(run_id)
+    if args.reparse:
+        logger.log("INFO", "Re-parse run started (archived pages, no browser)")
+    else:
+        logger.log("INFO",
+                   f"Scrape run started (debug={config.DEBUG}, workers={config.WORKERS}, "
+                   f"engine={'async' if args.use_async else 'sync'}, fetch={config.FETCH_MODE}, "
+                   f"full_scan={config.FULL_SCAN})")
 
-    pw = None
-    context = None
-    invoices_processed = 0
-    invoices_skipped = 0
+    stats = {"processed": 0, "skipped": 0}
 
     try:
-        # Launch browser and login
-        db.log(conn, run_id, "INFO", "Launching browser...")
-        pw, context, page = launch_browser()
-
-        db.log(conn, run_id, "INFO", "Attempting login...")
-        login(page)
-        db.log(conn, run_id, "INFO", "Login successful")
-
-        # Navigate to invoices list
-        db.log(conn, run_id, "INFO", "Navigating to invoices list...")
-        navigate_to_invoices(page)
-
-        # Parse invoice list from all pages
-        db.log(conn, run_id, "INFO", "Parsing invoice list...")
-        all_invoices = parse_invoice_list(page)
-        db.log(conn, run_id, "INFO", f"Found {len(all_invoices)} invoices in grid")
-
-        # Filter to unprocessed invoices
-        unprocessed = []
-        for inv in all_invoices:
-            if db.invoice_exists(conn, inv["invoice_id"]):
-                invoices_skipped += 1
-            else:
-                unprocessed.append(inv)
-
-        db.log(conn, run_id, "INFO",
-               f"{len(unprocessed)} new invoices to process, {invoices_skipped} already in DB")
-
-        if config.DEBUG and unprocessed:
-            unprocessed = [unprocessed[0]]
-            db.log(conn, run_id, "INFO", "DEBUG mode: processing only first unprocessed invoice")
-
-        # Process each invoice
-        for inv in unprocessed:
-            invoice_id = inv["invoice_id"]
-            db.log(conn, run_id, "INFO", f"Processing invoice {invoice_id}...")
-
-            try:
-                # Navigate to invoice summary
-                navigate_to_invoice_summary(page, invoice_id)
-
-                # Parse invoice summary (financials + properties)
-                summary = parse_invoice_summary(page, invoice_id)
-
-                # Merge grid data with summary data
-                invoice_data = {**inv}
-                if summary.get("check_number"):
-                    invoice_data["check_number"] = summary["check_number"]
-                if summary.get("total_revenue") is not None:
-                    invoice_data["total_revenue"] = summary["total_revenue"]
-                if summary.get("total_tax") is not None:
-                    invoice_data["total_tax"] = summary["total_tax"]
-                if summary.get("total_deductions") is not None:
-                    invoice_data["total_deductions"] = summary["total_deductions"]
-                if summary.get("total_amount") is not None:
-                    invoice_data["total_amount"] = summary["total_amount"]
-
-                # Insert invoice record
-                db.insert_invoice(conn, run_id, invoice_data)
-                db.log(conn, run_id, "INFO",
-                       f"Inserted invoice {invoice_id}: {invoice_data.get('operator')} "
-                       f"check #{invoice_data.get('check_number')}")
-
-                # Process each property/statement
-                properties = summary.get("properties", [])
-                db.log(conn, run_id, "INFO",
-                       f"Invoice {invoice_id} has {len(properties)} properties")
-
-                for prop in properties:
-                    statement_id = prop["statement_id"]
-
-                    try:
-                        # Insert property record
-                        db.insert_property(conn, invoice_id, prop)
-
-                        # Navigate to statement detail
-                        navigate_to_statement(page, statement_id)
-
-                        # Parse statement details
-                        details = parse_statement_details(page, statement_id)
-                        db.log(conn, run_id, "INFO",
-                               f"Statement {statement_id}: {len(details)} line items")
-
-                        # Insert each line item
-                        for detail in details:
-                            db.insert_statement_detail(conn, statement_id, detail)
-
-                    except Exception as e:
-                        db.log(conn, run_id, "WARNING",
-                               f"Error processing statement {statement_id}: {e}")
-                        continue
-
-                invoices_processed += 1
-
-            except Exception as e:
-                db.log(conn, run_id, "WARNING",
-                       f"Error processing invoice {invoice_id}: {e}")
-                continue
+        if args.reparse:
+            import reparse
+            reparse.run(conn, run_id, stats, logger)
+        elif args.use_async:
+            import async_scraper
+            asyncio.run(async_scraper.run(conn, run_id, stats, logger))
+        else:
+            _run_sync(conn, run_id, stats, logger)
 
         # Success
         db.finish_run(conn, run_id, "success",
-                      invoices_processed=invoices_processed,
-                      invoices_skipped=invoices_skipped)
-        db.log(conn, run_id, "INFO",
-               f"Scrape completed: {invoices_processed} processed, {invoices_skipped} skipped")
-        print(f"Done: {invoices_processed} invoices processed, {invoices_skipped} skipped")
+                      invoices_processed=stats["processed"],
+                      invoices_skipped=stats["skipped"])
+        logger.log("INFO",
+                   f"Scrape completed: {stats['processed']} processed, {stats['skipped']} skipped")
+        print(f"Done: {stats['processed']} invoices processed, {stats['skipped']} skipped")
 
     except MFARequiredError as e:
-        db.log(conn, run_id, "ERROR", f"MFA required: {e}")
+        logger.log("ERROR", f"MFA required: {e}")
         db.finish_run(conn, run_id, "mfa_required", error_message=str(e))
         print(f"MFA required - please log in manually and trust this device. {e}")
         sys.exit(1)
 
     except LoginError as e:
-        db.log(conn, run_id, "ERROR", f"Login failed: {e}")
+        logger.log("ERROR", f"Login failed: {e}")
         db.finish_run(conn, run_id, "failure", error_message=str(e))
         print(f"Login failed: {e}")
         sys.exit(1)
 
     except Exception as e:
         tb = traceback.format_exc()
-        db.log(conn, run_id, "ERROR", f"Unexpected error: {e}\n{tb}")
+        logger.log("ERROR", f"Unexpected error: {e}\n{tb}")
         db.finish_run(conn, run_id, "failure",
-                      invoices_processed=invoices_processed,
-                      invoices_skipped=invoices_skipped,
+                      invoices_processed=stats["processed"],
+                      invoices_skipped=stats["skipped"],
                       error_message=f"{e}\n{tb}")
         print(f"Error: {e}")
         sys.exit(1)
 
+    finally:
+        logger.close()
+        conn.close()
+
+
+def _run_sync(conn, run_id: int, stats: dict, logger: RunLogger) -> None:
+    """Scrape with the sync Playwright engine.
+
+    The invoice grid is walked one page at a time on the login page. Each
+    page's new invoices, and their statements, are fetched before the next
+    grid page is loaded. A PagePool of separate worker pages does the
+    fetching, or an HttpPool sharing the browser's session cookies in HTTP
+    fetch mode.
+    """
+    pw = None
+    context = None
+
+    try:
+        # Launch browser and login
+        logger.log("INFO", "Launching browser...")
+        pw, context, page = launch_browser()
+
+        logger.log("INFO", "Attempting login...")
+        login(page)
+        logger.log("INFO", "Login successful")
+
+        # Navigate to invoices list
+        logger.log("INFO", "Navigating to invoices list...")
+        navigate_to_invoices(page)
+
+        # Fetch invoices and their statements through the worker pool.
+        # Statement jobs go to the front of the queue so each invoice is
+        # finished before the next one is started. Every job is a work item
+        # in the DB, so a crashed run resumes where it stopped.
+        queue = deque(pipeline.resume_jobs(conn, run_id, logger))
+        limiter = RateLimiter(config.RATE_LIMIT)
+        if config.FETCH_MODE == "http":
+            pool = HttpPool(HttpFetcher.from_browser(context, page), config.WORKERS, limiter)
+            parse_summary, parse_details = parse_invoice_summary_html, parse_statement_details_html
+            logger.log("INFO", f"Fetching raw HTML with {pool.size} worker thread(s)")
+        else:
+            pool = PagePool(context, config.WORKERS, limiter)
+            parse_summary, parse_details = parse_invoice_summary, parse_statement_details
+            logger.log("INFO", f"Fetching with {pool.size} worker page(s)")
+
+        # The handler gets a loaded page, or the raw HTML in HTTP fetch mode
+        def handle(loaded, job):
+            try:
+                if job["kind"] == "invoice":
+                    invoice_id = job["id"]
+                    logger.log("INFO", f"Processing invoice {invoice_id}...")
+                    summary = parse_summary(loaded, invoice_id)
+                    statement_ids = pipeline.store_invoice(conn, run_id, logger,
+                                                           job["invoice"], summary)
+                    queue.extendleft(pipeline.statement_job(sid, invoice_id)
+                                     for sid in reversed(statement_ids))
+                    stats["processed"] += 1
+                else:
+                    details = parse_details(loaded, job["id"])
+                    pipeline.store_statement(conn, logger, job["id"], details)
+            finally:
+                # Archived after parsing, once the page has fully rendered,
+                # and even if parsing failed so a fixed parser can --reparse it
+                if config.ARCHIVE_PAGES:
+                    read_html = (lambda: loaded) if config.FETCH_MODE == "http" else loaded.content
+                    pipeline.archive_page(logger, run_id, job["kind"], job["id"], read_html)
+
+        def on_error(job, e):
+            # A lost session fails every remaining job; abort the run instead.
+            # Its claimed items are picked up again by the next run.
+            if isinstance(e, LoginError):
+                raise e
+            pipeline.fail_item(conn, logger, job["kind"], job["id"], e)
+
+        if queue:
+            pool.run(queue, handle, on_error)
+
+        logger.log("INFO", "Scanning invoice list...")
+        scan = pipeline.new_scan()
+        for grid_invoices in iter_invoice_pages(page):
+            unprocessed = pipeline.scan_grid_page(conn, run_id, logger, scan,
+                                                  grid_invoices, stats)
+            queue.extend(pipeline.invoice_job(inv) for inv in unprocessed)
+            pool.run(queue, handle, on_error)
+            if scan["stop"]:
+                break
+        pipeline.log_scan(logger, scan, stats)
+
+        pool.close()
+        logger.log("INFO", f"Page readiness waits: {TIMINGS.summary()}")
+
     finally:
         if pw and context:
             close_browser(pw, context)
-        conn.close()
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description="EnergyLink royalty portal scraper")
     parser.add_argument("--debug", action="store_true",
                         help="Process only the first unprocessed invoice")
+    parser.add_argument("--workers", type=int, default=config.WORKERS,
+                        help=f"Number of browser pages fetching in parallel (default {config.WORKERS})")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Use the asyncio Playwright engine")
+    parser.add_argument("--fetch", choices=["browser", "http"], default=config.FETCH_MODE,
+                        help="Render summary pages in the browser, or GET their raw HTML "
+                             "with the login session's cookies")
+    parser.add_argument("--reparse", action="store_true",
+                        help="Rebuild properties and statement details from the page "
+                             "archive instead of scraping")
+    parser.add_argument("--full-scan", action="store_true",
+                        help="Walk every invoice grid page instead of stopping after "
+                             "pages with no new invoices")
+    parser.add_argument("--no-archive", action="store_true",
+                        help="Don't archive the raw HTML of fetched pages")
     return parser.parse_args()
 
 
@@ -0,0 +1,152 @@
+"""Worker pools for fetching invoice and statement pages in parallel.
+
+Playwright's sync API is not thread-safe, so the pool drives all of its pages
+from the calling thread. Each idle page pulls the next job from a shared queue
+and starts its navigation, which returns as soon as the server responds. The
+browser then loads every in-flight page concurrently while the pool waits on
+the oldest one, parses it, and hands the page back for the next job.
+
+HttpPool offers the same interface for HTTP fetch mode, where raw HTML is
+fetched on a thread pool and handed to the handler instead of a page.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from playwright.sync_api import BrowserContext
+
+from browser import start_navigation, finish_navigation
+
+
+class RateLimiter:
+    """Global limit on page loads per second, shared by every worker."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the next request slot is available."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class AsyncRateLimiter:
+    """RateLimiter for the asyncio engine; waits without blocking the event loop."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def wait(self) -> None:
+        """Sleep until the next request slot is available."""
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class PagePool:
+    """A fixed set of pages in one browser context that share a job queue.
+
+    A job is a dict with at least "kind", "id" and "url" keys, and optionally
+    a "ready" readiness wait to run once the page has loaded.
+    """
+
+    def __init__(self, context: BrowserContext, size: int, limiter: RateLimiter):
+        self.pages = [context.new_page() for _ in range(max(1, size))]
+        self.limiter = limiter
+
+    @property
+    def size(self) -> int:
+        return len(self.pages)
+
+    def run(self, queue: deque, handler, on_error) -> None:
+        """Process jobs until the queue is empty and no page is loading.
+
+        handler(page, job) is called once the job's page has loaded; it may
+        push follow-up jobs onto the queue. on_error(job, exc) is called if
+        loading or handling a job raises.
+        """
+        idle = list(self.pages)
+        in_flight = deque()
+
+        while queue or in_flight:
+            # Start a navigation on every idle page
+            while idle and queue:
+                job = queue.popleft()
+                page = idle.pop()
+                self.limiter.wait()
+                try:
+                    start_navigation(page, job["url"])
+                except Exception as e:
+                    on_error(job, e)
+                    idle.append(page)
+                    continue
+                in_flight.append((page, job))
+
+            if not in_flight:
+                continue
+
+            # Finish the oldest navigation; the rest keep loading meanwhile
+            page, job = in_flight.popleft()
+            try:
+                finish_navigation(page, job.get("ready"))
+                handler(page, job)
+            except Exception as e:
+                on_error(job, e)
+            idle.append(page)
+
+    def close(self) -> None:
+        """Close the pool's pages."""
+        for page in self.pages:
+            try:
+                page.close()
+            except Exception:
+                pass
+
+
+class HttpPool:
+    """Fetches job URLs over HTTP on worker threads; same interface as PagePool.
+
+    handler(html, job) and on_error(job, exc) run on the calling thread, so
+    they can safely write to the database.
+    """
+
+    def __init__(self, fetcher, size: int, limiter: RateLimiter):
+        self.fetcher = fetcher
+        self.size = max(1, size)
+        self.limiter = limiter
+
+    def _fetch(self, url: str) -> str:
+        self.limiter.wait()
+        return self.fetcher.get(url)
+
+    def run(self, queue: deque, handler, on_error) -> None:
+        """Process jobs until the queue is empty and no request is pending."""
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            while queue or pending:
+                while queue and len(pending) < self.size:
+                    job = queue.popleft()
+                    pending[executor.submit(self._fetch, job["url"])] = job
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = pending.pop(future)
+                    try:
+                        handler(future.result(), job)
+                    except Exception as e:
+                        on_error(job, e)
+
+    def close(self) -> None:
+        pass